@@ -0,0 +1,105 @@
+"""Compare the original per-scan heuristic with the compiled, vectorized rule engine.
+
+Run from the ``ai_engine`` directory::
+
+    python -m benchmarks.scoring_benchmark --scans 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any
+
+from src.rules import DEFAULT_RULES, compile_rules
+from src.scoring import compute_risk_scores, score_batch
+
+PORTS = [21, 22, 23, 25, 53, 80, 110, 143, 443, 445, 993, 3306, 3389, 5432, 5900, 8080]
+
+
+def legacy_risk_score(parsed_result: dict[str, Any]) -> tuple[float, str, list[dict[str, Any]]]:
+    ports = parsed_result.get("ports", [])
+    open_ports = [p for p in ports if p.get("state") == "open"]
+    high_risk_ports = {22, 3389, 445, 5900, 21, 23}
+
+    feature_importance: list[dict[str, Any]] = []
+    score = 0.1 * len(open_ports)
+    if any(port.get("port") in high_risk_ports for port in open_ports):
+        score += 0.4
+        feature_importance.append({"feature": "high_risk_port", "value": 1, "impact": 0.4})
+    if len(open_ports) > 5:
+        score += 0.2
+        feature_importance.append({"feature": "too_many_open_ports", "value": len(open_ports), "impact": 0.2})
+    if len(open_ports) == 0:
+        score = 0.05
+        feature_importance.append({"feature": "no_open_ports", "value": 0, "impact": -0.1})
+
+    score = min(score, 1.0)
+
+    severity = "low"
+    if score >= 0.7:
+        severity = "high"
+    elif score >= 0.4:
+        severity = "medium"
+
+    if not feature_importance:
+        feature_importance.append({"feature": "baseline", "value": 1, "impact": score})
+
+    return score, severity, feature_importance
+
+
+def synthetic_rules(extra: int) -> dict[str, Any]:
+    rng = random.Random(extra)
+    rules = dict(DEFAULT_RULES)
+    rules["rules"] = [
+        *DEFAULT_RULES["rules"],
+        *(
+            {"feature": f"synthetic_{index}", "ports": rng.sample(range(1024, 65535), 5), "weight": 0.01}
+            for index in range(extra)
+        ),
+    ]
+    return rules
+
+
+def synthetic_scans(count: int, seed: int = 7) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "ip": f"10.0.{index >> 8 & 255}.{index & 255}",
+            "ports": [
+                {"port": port, "protocol": "tcp", "state": rng.choice(("open", "open", "filtered"))}
+                for port in rng.sample(PORTS, rng.randint(0, 9))
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def timed(label: str, count: int, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>24}: {elapsed:.3f}s ({count / elapsed:,.0f} scans/s)")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scans", type=int, default=100_000)
+    parser.add_argument("--extra-rules", type=int, default=500)
+    args = parser.parse_args()
+
+    scans = synthetic_scans(args.scans)
+    rules = compile_rules(DEFAULT_RULES)
+    per_item = timed("per-item", args.scans, lambda: [legacy_risk_score(scan) for scan in scans])
+    batch = timed("batch (with explanations)", args.scans, compute_risk_scores, scans, rules)
+    timed("batch (scores only)", args.scans, score_batch, scans, rules)
+    print("identical results:", per_item == batch)
+    if args.extra_rules:
+        many = compile_rules(synthetic_rules(args.extra_rules))
+        timed(f"scores, {many.rule_count} rules", args.scans, score_batch, scans, many)
+
+
+if __name__ == "__main__":
+    main()
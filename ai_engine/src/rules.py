@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+RULES_PATH = Path(os.getenv("RISK_RULES", "/app/risk_rules.json"))
+MAX_PORT = 65535
+
+DEFAULT_RULES: dict[str, Any] = {
+    "per_open_port": 0.1,
+    "max_score": 1.0,
+    "severity_thresholds": {"high": 0.7, "medium": 0.4},
+    "no_open_ports": {"feature": "no_open_ports", "score": 0.05, "impact": -0.1},
+    "rules": [
+        {"feature": "high_risk_port", "ports": [22, 3389, 445, 5900, 21, 23], "weight": 0.4},
+        {"feature": "too_many_open_ports", "min_open_ports": 6, "weight": 0.2},
+    ],
+}
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    features: tuple[str, ...]
+    weights: np.ndarray
+    min_open_ports: np.ndarray
+    # Rules without ports/services fire on the open-port count alone and report it as their value.
+    count_only: np.ndarray
+    # Port number -> row of port_masks; -1 selects the trailing all-zero row.
+    port_lookup: np.ndarray
+    port_masks: np.ndarray
+    service_lookup: dict[str, int]
+    service_masks: np.ndarray
+    per_open_port: float
+    max_score: float
+    high_threshold: float
+    medium_threshold: float
+    empty_feature: str
+    empty_score: float
+    empty_impact: float
+
+    @property
+    def rule_count(self) -> int:
+        return len(self.features)
+
+
+def _packed_masks(members: dict[Any, list[int]], rule_count: int) -> tuple[dict[Any, int], np.ndarray]:
+    lookup = {key: row for row, key in enumerate(members)}
+    masks = np.zeros((len(members) + 1, rule_count), dtype=bool)
+    for key, rule_indexes in members.items():
+        masks[lookup[key], rule_indexes] = True
+    return lookup, np.packbits(masks, axis=1)
+
+
+def compile_rules(config: dict[str, Any]) -> CompiledRules:
+    rules = config.get("rules", [])
+    port_members: dict[int, list[int]] = {}
+    service_members: dict[str, list[int]] = {}
+    for index, rule in enumerate(rules):
+        for port in rule.get("ports", []):
+            if not 0 <= int(port) <= MAX_PORT:
+                raise ValueError(f"Rule {rule.get('feature')!r} references invalid port {port}")
+            port_members.setdefault(int(port), []).append(index)
+        for service in rule.get("services", []):
+            service_members.setdefault(str(service).lower(), []).append(index)
+
+    port_rows, port_masks = _packed_masks(port_members, len(rules))
+    port_lookup = np.full(MAX_PORT + 1, -1, dtype=np.int32)
+    for port, row in port_rows.items():
+        port_lookup[port] = row
+    service_lookup, service_masks = _packed_masks(service_members, len(rules))
+
+    thresholds = config.get("severity_thresholds", {})
+    empty = config.get("no_open_ports", {})
+    return CompiledRules(
+        features=tuple(rule["feature"] for rule in rules),
+        weights=np.array([float(rule.get("weight", 0.0)) for rule in rules]),
+        min_open_ports=np.array([int(rule.get("min_open_ports", 0)) for rule in rules]),
+        count_only=np.array([not rule.get("ports") and not rule.get("services") for rule in rules]),
+        port_lookup=port_lookup,
+        port_masks=port_masks,
+        service_lookup=service_lookup,
+        service_masks=service_masks,
+        per_open_port=float(config.get("per_open_port", 0.1)),
+        max_score=float(config.get("max_score", 1.0)),
+        high_threshold=float(thresholds.get("high", 0.7)),
+        medium_threshold=float(thresholds.get("medium", 0.4)),
+        empty_feature=empty.get("feature", "no_open_ports"),
+        empty_score=float(empty.get("score", 0.05)),
+        empty_impact=float(empty.get("impact", -0.1)),
+    )
+
+
+_compiled: CompiledRules | None = None
+_compiled_mtime: float | None = None
+
+
+def load_rules() -> CompiledRules:
+    """Return the compiled rule set, recompiling only when the rule file changed on disk."""
+    global _compiled, _compiled_mtime
+    if not RULES_PATH.exists():
+        RULES_PATH.write_text(json.dumps(DEFAULT_RULES, indent=2), encoding="utf-8")
+    mtime = RULES_PATH.stat().st_mtime
+    if _compiled is not None and mtime == _compiled_mtime:
+        return _compiled
+    try:
+        compiled = compile_rules(json.loads(RULES_PATH.read_text(encoding="utf-8")))
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        if _compiled is None:
+            raise
+        logger.error("Ignoring invalid risk rules in {}: {}", RULES_PATH, exc)
+        _compiled_mtime = mtime
+        return _compiled
+    logger.info("Loaded {} risk rules from {}", compiled.rule_count, RULES_PATH)
+    _compiled, _compiled_mtime = compiled, mtime
+    return compiled
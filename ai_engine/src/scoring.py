@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import gc
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+import numpy as np
+
+from .rules import CompiledRules, load_rules
+
+SEVERITIES = np.array(["low", "medium", "high"])
+
+
+def build_feature_matrix(
+    parsed_results: Sequence[dict[str, Any]], rules: CompiledRules
+) -> tuple[np.ndarray, np.ndarray]:
+    scan_index: list[int] = []
+    port_numbers: list[int] = []
+    service_rows: list[int] = []
+    for index, parsed_result in enumerate(parsed_results):
+        for port in parsed_result.get("ports", []):
+            if port.get("state") == "open":
+                number = port.get("port")
+                scan_index.append(index)
+                port_numbers.append(number if isinstance(number, int) else -1)
+                service_rows.append(
+                    rules.service_lookup.get(str(port.get("service", "")).lower(), -1)
+                )
+
+    rows = np.asarray(scan_index, dtype=np.int64)
+    numbers = np.asarray(port_numbers, dtype=np.int64)
+    open_counts = np.bincount(rows, minlength=len(parsed_results))
+
+    valid = (numbers >= 0) & (numbers < len(rules.port_lookup))
+    port_rows = np.where(valid, rules.port_lookup[np.where(valid, numbers, 0)], -1)
+    entry_masks = rules.port_masks[port_rows] | rules.service_masks[np.asarray(service_rows, dtype=np.int64)]
+
+    # Entries are grouped by scan, so one reduceat ORs every scan's port bitmasks together.
+    packed_hits = np.zeros((len(parsed_results), rules.port_masks.shape[1]), dtype=np.uint8)
+    if len(rows):
+        scans_with_ports, starts = np.unique(rows, return_index=True)
+        packed_hits[scans_with_ports] = np.bitwise_or.reduceat(entry_masks, starts, axis=0)
+    matched = np.unpackbits(packed_hits, axis=1, count=rules.rule_count).astype(bool)
+    return open_counts, matched
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # A batch allocates a few dicts and lists per scan, none of them cyclic. Left running,
+    # the cyclic collector keeps re-traversing everything alive (the scans included) and
+    # costs more than building the explanations does.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def score_batch(
+    parsed_results: Sequence[dict[str, Any]], rules: CompiledRules
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    open_counts, matched = build_feature_matrix(parsed_results, rules)
+    no_open = open_counts == 0
+    fired = (
+        (matched | rules.count_only)
+        & (open_counts[:, None] >= rules.min_open_ports)
+        & ~no_open[:, None]
+    )
+    contributions = np.where(fired, rules.weights, 0.0)
+
+    # np.add.accumulate sums strictly left to right, i.e. in rule order, so floats match a
+    # sequential `score += weight` loop exactly however many rules there are.
+    steps = np.column_stack([rules.per_open_port * open_counts, contributions])
+    scores = np.add.accumulate(steps, axis=1)[:, -1]
+    scores = np.where(no_open, rules.empty_score, scores)
+    scores = np.minimum(scores, rules.max_score)
+
+    levels = (scores >= rules.medium_threshold).astype(np.int64) + (scores >= rules.high_threshold)
+    return scores, SEVERITIES[levels], open_counts, fired
+
+
+def compute_risk_scores(
+    parsed_results: Sequence[dict[str, Any]], rules: CompiledRules | None = None
+) -> list[tuple[float, str, list[dict[str, Any]]]]:
+    rules = rules or load_rules()
+    with _gc_paused():
+        scores, severities, open_counts, fired = score_batch(parsed_results, rules)
+
+        # Every fired (scan, rule) pair becomes one entry. Its columns are gathered with numpy
+        # and the dicts built in one pass; nonzero() is row-major, so each scan's entries are
+        # a contiguous slice, in rule order.
+        rows, columns = np.nonzero(fired)
+        values = np.where(rules.count_only[columns], open_counts[rows], 1)
+        entries = [
+            {"feature": feature, "value": value, "impact": impact}
+            for feature, value, impact in zip(
+                np.asarray(rules.features, dtype=object)[columns].tolist(),
+                values.tolist(),
+                rules.weights[columns].tolist(),
+            )
+        ]
+        fired_counts = fired.sum(axis=1)
+        ends = np.cumsum(fired_counts).tolist()
+        explanations = [entries[start:end] for start, end in zip([0, *ends[:-1]], ends)]
+
+        score_list = scores.tolist()
+        no_open = open_counts == 0
+        for row in np.flatnonzero(no_open).tolist():
+            explanations[row].append(
+                {"feature": rules.empty_feature, "value": 0, "impact": rules.empty_impact}
+            )
+        for row in np.flatnonzero(~no_open & (fired_counts == 0)).tolist():
+            explanations[row].append({"feature": "baseline", "value": 1, "impact": score_list[row]})
+        return list(zip(score_list, severities.tolist(), explanations))
+
+
+def compute_risk_score(
+    parsed_result: dict[str, Any], rules: CompiledRules | None = None
+) -> tuple[float, str, list[dict[str, Any]]]:
+    return compute_risk_scores([parsed_result], rules)[0]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import os
 from collections.abc import Sequence
@@ -11,10 +12,22 @@ from typing import Any
 import httpx
 from loguru import logger
 
+from common.client import create_backend_client
+from common.events import follow_events
+from common.journal import JournalWriter
+
+from .scoring import compute_risk_scores
+
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://backend:8000")
 MODEL_REFRESH_INTERVAL = int(os.getenv("MODEL_REFRESH_INTERVAL", "600"))
 ALERTS_DIR = Path(os.getenv("ALERTS_DIR", "/data/alerts"))
 AUDIT_DIR = Path(os.getenv("AUDIT_DIR", "/data/audit"))
+STATE_PATH = Path(os.getenv("AI_ENGINE_STATE", "/data/alerts/.ai_engine_state.json"))
+SCAN_PAGE_SIZE = int(os.getenv("SCAN_PAGE_SIZE", "200"))
+
+
+alert_journal = JournalWriter(ALERTS_DIR / "alerts.jsonl")
+audit_journal = JournalWriter(AUDIT_DIR / "audit.jsonl")
 
 
 def ensure_directories() -> None:
@@ -22,51 +35,36 @@ def ensure_directories() -> None:
     AUDIT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def compute_risk_score(parsed_result: dict[str, Any]) -> tuple[float, str, list[dict[str, Any]]]:
-    ports = parsed_result.get("ports", [])
-    open_ports = [p for p in ports if p.get("state") == "open"]
-    high_risk_ports = {22, 3389, 445, 5900, 21, 23}
-
-    feature_importance: list[dict[str, Any]] = []
-    score = 0.1 * len(open_ports)
-    if any(port.get("port") in high_risk_ports for port in open_ports):
-        score += 0.4
-        feature_importance.append({"feature": "high_risk_port", "value": 1, "impact": 0.4})
-    if len(open_ports) > 5:
-        score += 0.2
-        feature_importance.append({"feature": "too_many_open_ports", "value": len(open_ports), "impact": 0.2})
-    if len(open_ports) == 0:
-        score = 0.05
-        feature_importance.append({"feature": "no_open_ports", "value": 0, "impact": -0.1})
-
-    score = min(score, 1.0)
-
-    severity = "low"
-    if score >= 0.7:
-        severity = "high"
-    elif score >= 0.4:
-        severity = "medium"
-
-    if not feature_importance:
-        feature_importance.append({"feature": "baseline", "value": 1, "impact": score})
-
-    return score, severity, feature_importance
+def load_state() -> int:
+    if not STATE_PATH.exists():
+        return 0
+    try:
+        return int(json.loads(STATE_PATH.read_text(encoding="utf-8")).get("last_scan_id", 0))
+    except (json.JSONDecodeError, ValueError):
+        return 0
 
 
-async def fetch_scans(client: httpx.AsyncClient) -> Sequence[dict[str, Any]]:
-    response = await client.get("/api/v1/scans")
-    response.raise_for_status()
-    return response.json()
+def save_state(last_scan_id: int) -> None:
+    tmp_path = STATE_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"last_scan_id": last_scan_id}), encoding="utf-8")
+    tmp_path.replace(STATE_PATH)
 
 
-async def fetch_existing_alerts(client: httpx.AsyncClient) -> Sequence[dict[str, Any]]:
-    response = await client.get("/api/v1/alerts")
+async def fetch_scans(
+    client: httpx.AsyncClient, after_id: int, limit: int = SCAN_PAGE_SIZE
+) -> Sequence[dict[str, Any]]:
+    response = await client.get("/api/v1/scans/feed", params={"after_id": after_id, "limit": limit})
     response.raise_for_status()
     return response.json()
 
 
-def alert_exists(existing_alerts: Sequence[dict[str, Any]], asset_id: int, summary: str) -> bool:
-    return any((alert.get("asset_id") == asset_id) and (alert.get("summary") == summary) for alert in existing_alerts)
+def alert_dedup_key(
+    asset_id: int, summary: str, severity: str, feature_importance: list[dict[str, Any]]
+) -> str:
+    # Severity is part of the key so an escalation raises a new alert instead of being folded
+    # into the earlier, lower-severity one.
+    features = ",".join(sorted(entry["feature"] for entry in feature_importance))
+    return hashlib.sha256(f"{asset_id}|{summary}|{severity}|{features}".encode()).hexdigest()
 
 
 async def emit_alert(
@@ -77,7 +75,8 @@ async def emit_alert(
     score: float,
     parsed_result: dict[str, Any],
     feature_importance: list[dict[str, Any]],
-) -> dict[str, Any]:
+    dedup_key: str,
+) -> dict[str, Any] | None:
     alert_payload = {
         "asset_id": asset_id,
         "summary": summary,
@@ -85,16 +84,16 @@ async def emit_alert(
         "score": round(score, 2),
         "details": parsed_result,
         "explanation": {"feature_importance": feature_importance},
+        "dedup_key": dedup_key,
     }
     response = await client.post("/api/v1/alerts", json=alert_payload)
     response.raise_for_status()
+    if response.status_code != 201:
+        logger.debug("Alert already exists for asset %s", asset_id)
+        return None
     alert_record = response.json()
 
-    alert_path = ALERTS_DIR / "alerts.jsonl"
-    with alert_path.open("a", encoding="utf-8") as alert_file:
-        alert_file.write(json.dumps(alert_record) + "\n")
-
-    audit_path = AUDIT_DIR / "audit.jsonl"
+    alert_journal.append(alert_record)
     audit_entry = {
         "timestamp": datetime.utcnow().isoformat(),
         "action": "alert_created",
@@ -104,29 +103,30 @@ async def emit_alert(
         "summary": summary,
         "explanation": feature_importance,
     }
-    with audit_path.open("a", encoding="utf-8") as audit_file:
-        audit_file.write(json.dumps(audit_entry) + "\n")
+    audit_journal.append(audit_entry)
 
     logger.info("AI engine emitted alert %s severity=%s score=%.2f", alert_record["id"], severity, score)
+    return alert_record
 
 
-async def process_scans() -> None:
+async def process_scans(client: httpx.AsyncClient) -> None:
     ensure_directories()
-    async with httpx.AsyncClient(base_url=BACKEND_BASE_URL, timeout=30) as client:
-        scans = await fetch_scans(client)
-        existing_alerts = await fetch_existing_alerts(client)
-
-        for scan in scans:
-            asset_id = scan.get("asset_id")
-            parsed_result = scan.get("parsed_result") or {}
-            if asset_id is None or not parsed_result:
-                continue
+    last_scan_id = load_state()
+    seen_keys: set[str] = set()
+    while scans := await fetch_scans(client, after_id=last_scan_id):
+        scorable = [
+            scan for scan in scans if scan.get("asset_id") is not None and scan.get("parsed_result")
+        ]
+        scored = compute_risk_scores([scan["parsed_result"] for scan in scorable])
+        for scan, (score, severity, feature_importance) in zip(scorable, scored):
+            asset_id = scan["asset_id"]
+            parsed_result = scan["parsed_result"]
             summary = f"AI risk score for asset {asset_id}"
-            if alert_exists(existing_alerts, asset_id, summary):
-                logger.debug("Alert already exists for asset %s", asset_id)
+            dedup_key = alert_dedup_key(asset_id, summary, severity, feature_importance)
+            if dedup_key in seen_keys:
                 continue
-            score, severity, feature_importance = compute_risk_score(parsed_result)
-            alert_record = await emit_alert(
+            seen_keys.add(dedup_key)
+            await emit_alert(
                 client,
                 asset_id=asset_id,
                 summary=summary,
@@ -134,19 +134,40 @@ async def process_scans() -> None:
                 score=score,
                 parsed_result=parsed_result,
                 feature_importance=feature_importance,
+                dedup_key=dedup_key,
             )
-            existing_alerts = [*existing_alerts, alert_record]
+        # Alerts must be durable before the cursor moves past the scans that raised them.
+        await alert_journal.flush()
+        await audit_journal.flush()
+        last_scan_id = scans[-1]["id"]
+        save_state(last_scan_id)
+        if len(scans) < SCAN_PAGE_SIZE:
+            break
 
 
 async def worker_loop() -> None:
-    while True:
-        try:
-            await process_scans()
-        except httpx.HTTPError as exc:
-            logger.error("Failed to process scans: %s", exc)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("Unexpected error in AI engine: %s", exc)
-        await asyncio.sleep(MODEL_REFRESH_INTERVAL)
+    wake = asyncio.Event()
+    subscription = asyncio.create_task(follow_events(BACKEND_BASE_URL, ["scan.created"], wake))
+    client = create_backend_client(BACKEND_BASE_URL)
+    try:
+        while True:
+            wake.clear()
+            try:
+                await process_scans(client)
+            except httpx.HTTPError as exc:
+                logger.error("Failed to process scans: %s", exc)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Unexpected error in AI engine: %s", exc)
+            # New scans wake us immediately; the interval is only a fallback poll.
+            try:
+                await asyncio.wait_for(wake.wait(), MODEL_REFRESH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        subscription.cancel()
+        await client.aclose()
+        await alert_journal.close()
+        await audit_journal.close()
 
 
 def main() -> None:
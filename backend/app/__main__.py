@@ -0,0 +1,11 @@
+import uvicorn
+
+from .config import settings
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:app",
+        host=settings.uvicorn_host,
+        port=settings.uvicorn_port,
+        workers=settings.uvicorn_workers,
+    )
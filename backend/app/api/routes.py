@@ -1,39 +1,167 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, status
+import ipaddress
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from .. import crud, schemas
-from ..database import get_session
+from ..cache import dashboard_cache
+from ..database import get_session, pool_status
+from ..events import broker, format_sse
 
 router = APIRouter(prefix="/api/v1", tags=["api"])
 
+DASHBOARD_TOPICS = {"alert.created", "scan.created", "action.created"}
+
+
+def _json_document(name: str, value: str | None) -> dict[str, Any] | list[Any] | None:
+    if value is None:
+        return None
+    try:
+        document = json.loads(value)
+    except ValueError:
+        document = None
+    if not isinstance(document, (dict, list)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{name} must be a JSON object or array",
+        )
+    return document
+
 
 @router.get("/health", status_code=status.HTTP_200_OK)
 async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/metrics/db-pool", response_model=schemas.PoolStatus)
+async def get_pool_metrics() -> schemas.PoolStatus:
+    # Per worker process; each uvicorn worker has its own pool.
+    return schemas.PoolStatus(**pool_status())
+
+
 @router.post("/assets", response_model=schemas.AssetRead, status_code=status.HTTP_201_CREATED)
 async def create_asset(
     asset: schemas.AssetCreate,
     session=Depends(get_session),
 ) -> schemas.AssetRead:
-    db_asset = await crud.upsert_asset(session, asset)
-    return schemas.AssetRead.model_validate(db_asset)
+    return await crud.upsert_asset(session, asset)
+
+
+@router.get("/assets", response_model=schemas.AssetPage)
+async def get_assets(
+    limit: int = Query(100, ge=1, le=5000),
+    cursor: str | None = None,
+    subnet: str | None = Query(None, description="CIDR the address must fall in, e.g. 10.2.0.0/16"),
+    session=Depends(get_session),
+) -> schemas.AssetPage:
+    if subnet is not None:
+        try:
+            subnet = str(ipaddress.ip_network(subnet, strict=False))
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    try:
+        assets, next_cursor = await crud.list_assets(
+            session, limit=limit, cursor=cursor, subnet=subnet
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return schemas.AssetPage(
+        items=[schemas.AssetRead.model_validate(asset) for asset in assets],
+        pagination=schemas.Pagination(limit=limit, next_cursor=next_cursor),
+    )
+
+
+@router.get("/assets/exposed", response_model=list[schemas.AssetRead])
+async def get_exposed_assets(
+    port: int | None = Query(None, ge=0, le=65535),
+    service: str | None = None,
+    port_state: str = "open",
+    since: datetime | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    session=Depends(get_session),
+) -> list[schemas.AssetRead]:
+    if port is None and service is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="port or service is required"
+        )
+    assets = await crud.list_exposed_assets(
+        session, port=port, service=service, port_state=port_state, since=since, limit=limit
+    )
+    return [schemas.AssetRead.model_validate(asset) for asset in assets]
+
+
+@router.get("/assets/risk", response_model=list[schemas.AssetRisk])
+async def get_asset_risk(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+    since: datetime | None = None,
+    session=Depends(get_session),
+) -> list[schemas.AssetRisk]:
+    rows = await crud.list_asset_risk(session, after_id=after_id, limit=limit, since=since)
+    return [schemas.AssetRisk.model_validate(row) for row in rows]
 
 
-@router.get("/alerts", response_model=list[schemas.AlertRead])
-async def get_alerts(session=Depends(get_session)) -> list[schemas.AlertRead]:
-    alerts = await crud.list_alerts(session)
-    return [schemas.AlertRead.model_validate(alert) for alert in alerts]
+@router.get("/alerts", response_model=schemas.AlertPage)
+async def get_alerts(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    severity: str | None = None,
+    status_: str | None = Query(None, alias="status"),
+    asset_id: int | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    feature: str | None = Query(None, description="Feature named in the alert's explanation"),
+    details: str | None = Query(None, description='JSON the details must contain, e.g. {"port": 22}'),
+    session=Depends(get_session),
+) -> schemas.AlertPage:
+    details_document = _json_document("details", details)
+    try:
+        alerts, next_cursor = await crud.list_alerts(
+            session,
+            limit=limit,
+            cursor=cursor,
+            severity=severity,
+            status=status_,
+            asset_id=asset_id,
+            created_after=created_after,
+            created_before=created_before,
+            feature=feature,
+            details=details_document,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return schemas.AlertPage(
+        items=[schemas.AlertRead.model_validate(alert) for alert in alerts],
+        pagination=schemas.Pagination(limit=limit, next_cursor=next_cursor),
+    )
 
 
 @router.post("/alerts", response_model=schemas.AlertRead, status_code=status.HTTP_201_CREATED)
 async def create_alert(
     alert: schemas.AlertCreate,
+    response: Response,
     session=Depends(get_session),
 ) -> schemas.AlertRead:
-    db_alert = await crud.create_alert(session, alert)
+    db_alert, created = await crud.get_or_create_alert(session, alert)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return schemas.AlertRead.model_validate(db_alert)
+
+
+@router.patch("/alerts/{alert_id}", response_model=schemas.AlertRead)
+async def update_alert(
+    alert_id: int,
+    update: schemas.AlertStatusUpdate,
+    session=Depends(get_session),
+) -> schemas.AlertRead:
+    db_alert = await crud.update_alert_status(session, alert_id, update.status)
+    if db_alert is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alert not found")
     return schemas.AlertRead.model_validate(db_alert)
 
 
@@ -46,12 +174,97 @@ async def create_scan(
     return schemas.ScanRead.model_validate(db_scan)
 
 
-@router.get("/scans", response_model=list[schemas.ScanRead])
-async def get_scans(session=Depends(get_session)) -> list[schemas.ScanRead]:
-    scans = await crud.list_scans(session)
+@router.post(
+    "/scans:bulk", response_model=schemas.ScanBulkResult, status_code=status.HTTP_201_CREATED
+)
+async def create_scans_bulk(
+    bulk: schemas.ScanBulkCreate,
+    response: Response,
+    session=Depends(get_session),
+) -> schemas.ScanBulkResult:
+    items, created = await crud.bulk_create_scans(session, bulk)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return schemas.ScanBulkResult(items=items)
+
+
+@router.get("/scans", response_model=schemas.ScanPage)
+async def get_scans(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    asset_id: int | None = None,
+    started_after: datetime | None = None,
+    started_before: datetime | None = None,
+    port: int | None = Query(None, ge=0, le=65535),
+    service: str | None = None,
+    port_state: str = "open",
+    parsed_result: str | None = Query(
+        None, description='JSON the parsed result must contain, e.g. {"os": "Linux 5.X"}'
+    ),
+    session=Depends(get_session),
+) -> schemas.ScanPage:
+    parsed_result_document = _json_document("parsed_result", parsed_result)
+    try:
+        scans, next_cursor = await crud.list_scans(
+            session,
+            limit=limit,
+            cursor=cursor,
+            asset_id=asset_id,
+            started_after=started_after,
+            started_before=started_before,
+            port=port,
+            service=service,
+            port_state=port_state,
+            parsed_result=parsed_result_document,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return schemas.ScanPage(
+        items=[schemas.ScanRead.model_validate(scan) for scan in scans],
+        pagination=schemas.Pagination(limit=limit, next_cursor=next_cursor),
+    )
+
+
+@router.get("/scans/feed", response_model=list[schemas.ScanRead])
+async def get_scan_feed(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    session=Depends(get_session),
+) -> list[schemas.ScanRead]:
+    scans = await crud.list_scans_after(session, after_id=after_id, limit=limit)
     return [schemas.ScanRead.model_validate(scan) for scan in scans]
 
 
+@router.get("/ports", response_model=schemas.PortObservationPage)
+async def get_port_observations(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    port: int | None = Query(None, ge=0, le=65535),
+    service: str | None = None,
+    state: str | None = Query(None, description="e.g. open, filtered, closed"),
+    asset_id: int | None = None,
+    changed_since: datetime | None = None,
+    session=Depends(get_session),
+) -> schemas.PortObservationPage:
+    try:
+        observations, next_cursor = await crud.list_port_observations(
+            session,
+            limit=limit,
+            cursor=cursor,
+            port=port,
+            service=service,
+            state=state,
+            asset_id=asset_id,
+            changed_since=changed_since,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return schemas.PortObservationPage(
+        items=[schemas.PortObservationRead.model_validate(item) for item in observations],
+        pagination=schemas.Pagination(limit=limit, next_cursor=next_cursor),
+    )
+
+
 @router.post("/actions", response_model=schemas.ActionLogRead, status_code=status.HTTP_201_CREATED)
 async def create_action(
     action: schemas.ActionLogCreate,
@@ -61,7 +274,60 @@ async def create_action(
     return schemas.ActionLogRead.model_validate(db_action)
 
 
+@router.post(
+    "/actions:bulk", response_model=list[schemas.ActionLogRead], status_code=status.HTTP_201_CREATED
+)
+async def create_actions_bulk(
+    actions: list[schemas.ActionLogCreate],
+    session=Depends(get_session),
+) -> list[schemas.ActionLogRead]:
+    db_actions = await crud.bulk_create_action_logs(session, actions)
+    return [schemas.ActionLogRead.model_validate(action) for action in db_actions]
+
+
+async def _load_dashboard(session) -> tuple[schemas.DashboardSummary, int, bytes]:
+    summary, cursor = await crud.get_dashboard_snapshot(session)
+    return summary, cursor, summary.model_dump_json().encode()
+
+
 @router.get("/dashboard", response_model=schemas.DashboardSummary)
-async def get_dashboard(session=Depends(get_session)) -> schemas.DashboardSummary:
-    summary = await crud.get_dashboard_summary(session)
-    return summary
+async def get_dashboard(session=Depends(get_session)) -> Response:
+    _, _, body = await dashboard_cache.get(lambda: _load_dashboard(session))
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/dashboard/stream")
+async def stream_dashboard(session=Depends(get_session)) -> StreamingResponse:
+    _, cursor, body = await dashboard_cache.get(lambda: _load_dashboard(session))
+
+    async def event_source():
+        yield f"event: snapshot\ndata: {body.decode()}\n\n"
+        async for event in broker.subscribe(cursor, DASHBOARD_TOPICS):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events/stream")
+async def stream_events(
+    after: int | None = Query(None, ge=0),
+    topics: str | None = Query(None, description="Comma-separated topics, e.g. scan.created"),
+    last_event_id: str | None = Header(None),
+) -> StreamingResponse:
+    if after is None and last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+    topic_filter = {topic.strip() for topic in topics.split(",") if topic.strip()} if topics else None
+
+    async def event_source():
+        async for event in broker.subscribe(after, topic_filter):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+from . import schemas
+from .config import settings
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """Single-value, process-local cache with single-flight refresh.
+
+    Concurrent misses wait for one loader instead of stampeding the database, and a value
+    loaded while an invalidation happened is returned to its caller but never cached.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._value: T | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._value is not None and time.monotonic() < self._expires_at
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._value = None
+
+    async def get(self, loader: Callable[[], Awaitable[T]]) -> T:
+        if self._fresh():
+            return self._value  # type: ignore[return-value]
+        async with self._lock:
+            if self._fresh():
+                return self._value  # type: ignore[return-value]
+            generation = self._generation
+            value = await loader()
+            if generation == self._generation:
+                self._value, self._expires_at = value, time.monotonic() + self.ttl
+            return value
+
+
+# (summary, event cursor, pre-serialized JSON body)
+dashboard_cache: TTLCache[tuple[schemas.DashboardSummary, int, bytes]] = TTLCache(settings.dashboard_cache_ttl)
+
+
+class AssetCache:
+    """Process-local, LRU-bounded snapshots of assets by IP, written through on every upsert.
+
+    An entry only answers for ``ttl`` seconds, which bounds both how stale ``last_seen`` gets
+    and how long a change written by another worker can go unnoticed here.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, schemas.AssetRead]] = OrderedDict()
+
+    def get(self, ip_address: str) -> schemas.AssetRead | None:
+        entry = self._entries.get(ip_address)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            del self._entries[ip_address]
+            return None
+        self._entries.move_to_end(ip_address)
+        return entry[1]
+
+    def unchanged(self, ip_address: str, hostname: str, os: str | None) -> schemas.AssetRead | None:
+        """The cached asset if an upsert with these values would change nothing but last_seen."""
+        asset = self.get(ip_address)
+        if asset is None or asset.hostname != hostname or asset.os != os:
+            return None
+        return asset
+
+    def put(self, asset: schemas.AssetRead) -> None:
+        self._entries[asset.ip_address] = (time.monotonic() + self.ttl, asset)
+        self._entries.move_to_end(asset.ip_address)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+asset_cache = AssetCache(settings.asset_cache_size, settings.asset_cache_ttl)
@@ -1,66 +1,664 @@
 from __future__ import annotations
 
+import base64
+import ipaddress
+import json
+from collections.abc import Iterable, Iterator
 from datetime import datetime
-from typing import Sequence
+from typing import Any, Sequence
 
-from sqlalchemy import func, select
+from pydantic import BaseModel
+from sqlalchemy import JSON, Integer, and_, case, cast, func, select, text, true, tuple_, update
+from sqlalchemy.dialects.postgresql import CIDR
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from . import models, schemas
+from . import events, models, partitions, schemas
+from .cache import asset_cache
+
+# asyncpg caps a statement at 32767 bind parameters; keep multi-row inserts well below it.
+BULK_CHUNK_SIZE = 1000
+SCAN_ORDER_LOCK_ID = 0x50C0_5CA0
+
+
+def _chunks(items: Sequence[Any], size: int = BULK_CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _json_to_jsonb(table: str, column: str) -> str:
+    return f"""
+    DO $$ BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+             WHERE table_schema = current_schema() AND table_name = '{table}'
+               AND column_name = '{column}') = 'json' THEN
+            ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb;
+        END IF;
+    END $$
+    """
+
+
+# create_all only creates missing tables; columns added later are patched in idempotently.
+# (Tables from before partitioning are rebuilt wholesale by partitions.detach_unpartitioned.)
+SCHEMA_UPGRADES = [
+    _json_to_jsonb("scans", "parsed_result"),
+    _json_to_jsonb("alerts", "details"),
+    _json_to_jsonb("alerts", "explanation"),
+    _json_to_jsonb("scan_rollups", "last_parsed_result"),
+    "CREATE INDEX IF NOT EXISTS ix_scans_parsed_result ON scans USING gin (parsed_result jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_details ON alerts USING gin (details jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_explanation ON alerts USING gin (explanation jsonb_path_ops)",
+    "ALTER TABLE assets ADD COLUMN IF NOT EXISTS ip_inet inet",
+    "CREATE INDEX IF NOT EXISTS ix_assets_ip_inet ON assets USING gist (ip_inet inet_ops)",
+    # Postgres 15 has no non-throwing inet cast, so rows that are not addresses are skipped one by one.
+    """
+    DO $$ DECLARE r record; BEGIN
+        FOR r IN SELECT id, ip_address FROM assets WHERE ip_inet IS NULL LOOP
+            BEGIN
+                UPDATE assets SET ip_inet = r.ip_address::inet WHERE id = r.id;
+            EXCEPTION WHEN invalid_text_representation THEN NULL;
+            END;
+        END LOOP;
+    END $$
+    """,
+]
+
+
+PORT_OBSERVATIONS_BACKFILL = """
+    INSERT INTO port_observations
+        (asset_id, port, protocol, service, state, first_seen, last_seen, state_changed_at)
+    SELECT DISTINCT ON (asset_id, port, protocol)
+           asset_id, port, protocol, service, state,
+           min(started_at) OVER w, max(started_at) OVER w, started_at
+      FROM (
+        SELECT s.asset_id, s.started_at,
+               (p->>'port')::int AS port,
+               coalesce(p->>'protocol', 'tcp') AS protocol,
+               left(coalesce(p->>'service', 'unknown'), 64) AS service,
+               left(coalesce(p->>'state', 'unknown'), 32) AS state
+          FROM scans AS s
+         CROSS JOIN LATERAL jsonb_array_elements(
+               CASE WHEN jsonb_typeof(s.parsed_result->'ports') = 'array'
+                    THEN s.parsed_result->'ports' ELSE '[]'::jsonb END) AS p
+         WHERE p->>'port' IS NOT NULL
+      ) AS observed
+    WINDOW w AS (PARTITION BY asset_id, port, protocol)
+     ORDER BY asset_id, port, protocol, started_at DESC
+"""
 
 
 async def init_models(session: AsyncSession) -> None:
     async with session.bind.begin() as conn:
+        await conn.execute(select(func.pg_advisory_xact_lock(partitions.MAINTENANCE_LOCK_ID)))
+        moved = await partitions.detach_unpartitioned(conn)
         await conn.run_sync(models.Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+        for policy in partitions.POLICIES:
+            await partitions.ensure_partitions(conn, policy)
+        await partitions.restore_unpartitioned(conn, moved)
+        if (await conn.execute(select(func.count()).select_from(models.PortObservation))).scalar_one() == 0:
+            await conn.execute(text(PORT_OBSERVATIONS_BACKFILL))
+        await conn.execute(text("LOCK TABLE alert_counters IN EXCLUSIVE MODE"))
+        if (await conn.execute(select(func.count()).select_from(models.AlertCounter))).scalar_one() == 0:
+            await conn.execute(
+                text(
+                    "INSERT INTO alert_counters (severity, status, count) "
+                    "SELECT severity, status, count(*) FROM alerts GROUP BY severity, status"
+                )
+            )
+
+
+def _inet(ip_address: str) -> str | None:
+    try:
+        return str(ipaddress.ip_interface(ip_address))
+    except ValueError:
+        return None
+
+
+def _asset_upsert(rows: list[dict[str, Any]]) -> Any:
+    stmt = pg_insert(models.Asset).values(
+        [{**row, "ip_inet": _inet(row["ip_address"])} for row in rows]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[models.Asset.ip_address],
+        set_={
+            "hostname": stmt.excluded.hostname,
+            "ip_inet": stmt.excluded.ip_inet,
+            "os": stmt.excluded.os,
+            "last_seen": stmt.excluded.last_seen,
+        },
+    ).returning(
+        models.Asset.id,
+        models.Asset.hostname,
+        models.Asset.ip_address,
+        models.Asset.os,
+        models.Asset.last_seen,
+    )
 
 
-async def upsert_asset(session: AsyncSession, asset: schemas.AssetCreate) -> models.Asset:
+async def upsert_asset(session: AsyncSession, asset: schemas.AssetCreate) -> schemas.AssetRead:
+    """Insert or refresh an asset; repeats within asset_cache_ttl are answered from the cache."""
+    cached = asset_cache.unchanged(asset.ip_address, asset.hostname, asset.os)
+    if cached is not None:
+        return cached
     result = await session.execute(
-        select(models.Asset).where(models.Asset.ip_address == asset.ip_address)
-    )
-    db_asset = result.scalar_one_or_none()
-    if db_asset is None:
-        db_asset = models.Asset(
-            hostname=asset.hostname,
-            ip_address=asset.ip_address,
-            os=asset.os,
-            last_seen=datetime.utcnow(),
-        )
-        session.add(db_asset)
-    else:
-        db_asset.hostname = asset.hostname
-        db_asset.os = asset.os
-        db_asset.last_seen = datetime.utcnow()
+        _asset_upsert([{**asset.model_dump(), "last_seen": datetime.utcnow()}])
+    )
+    db_asset = schemas.AssetRead.model_validate(result.one())
     await session.commit()
-    await session.refresh(db_asset)
+    asset_cache.put(db_asset)
     return db_asset
 
 
+def _event_payload(read_schema: type[BaseModel], obj: Any) -> dict[str, Any]:
+    return read_schema.model_validate(obj).model_dump(mode="json")
+
+
+async def _record_port_observations(
+    session: AsyncSession, results: Iterable[tuple[int, dict[str, Any] | None]], seen_at: datetime
+) -> None:
+    rows: dict[tuple[int, int, str], dict[str, Any]] = {}
+    scanned_assets: set[int] = set()
+    for asset_id, parsed_result in results:
+        ports = (parsed_result or {}).get("ports")
+        if not isinstance(ports, list):
+            continue
+        scanned_assets.add(asset_id)
+        for entry in ports:
+            if not isinstance(entry, dict) or not str(entry.get("port", "")).isdigit():
+                continue
+            protocol = str(entry.get("protocol") or "tcp")[:8]
+            key = (asset_id, int(entry["port"]), protocol)
+            rows[key] = {
+                "asset_id": asset_id,
+                "port": key[1],
+                "protocol": protocol,
+                "service": str(entry.get("service") or "unknown")[:64],
+                "state": str(entry.get("state") or "unknown")[:32],
+                "first_seen": seen_at,
+                "last_seen": seen_at,
+                "state_changed_at": seen_at,
+            }
+
+    table = models.PortObservation
+    for chunk in _chunks(list(rows.values())):
+        stmt = pg_insert(table).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.asset_id, table.port, table.protocol],
+            set_={
+                "service": stmt.excluded.service,
+                "state": stmt.excluded.state,
+                "last_seen": stmt.excluded.last_seen,
+                "state_changed_at": case(
+                    (table.state != stmt.excluded.state, stmt.excluded.last_seen),
+                    else_=table.state_changed_at,
+                ),
+            },
+            # A scan that arrives late must not roll newer observations back.
+            where=table.last_seen <= stmt.excluded.last_seen,
+        )
+        await session.execute(stmt)
+
+    # Ports a host no longer reports are closed as of this scan.
+    for chunk in _chunks(sorted(scanned_assets)):
+        await session.execute(
+            update(table)
+            .where(table.asset_id.in_(chunk), table.last_seen < seen_at, table.state != "closed")
+            .values(state="closed", state_changed_at=seen_at)
+        )
+
+
+async def _lock_scan_order(session: AsyncSession) -> None:
+    # Held until commit, so scan ids become visible in the order they were handed out and
+    # list_scans_after can never page past a scan that is still being written.
+    await session.execute(select(func.pg_advisory_xact_lock(SCAN_ORDER_LOCK_ID)))
+
+
 async def create_scan(session: AsyncSession, scan: schemas.ScanCreate) -> models.Scan:
     db_scan = models.Scan(**scan.model_dump())
+    await _lock_scan_order(session)
     session.add(db_scan)
+    await session.flush()
+    await _record_port_observations(
+        session, [(db_scan.asset_id, db_scan.parsed_result)], db_scan.started_at
+    )
+    await events.publish(session, [("scan.created", _event_payload(schemas.ScanRead, db_scan))])
     await session.commit()
     await session.refresh(db_scan)
     return db_scan
 
 
-async def create_alert(session: AsyncSession, alert: schemas.AlertCreate) -> models.Alert:
+async def _claim_scan_bulk(session: AsyncSession, key: str) -> list[schemas.ScanBulkItem] | None:
+    """Claim an idempotency key; returns the earlier result if the key was already used.
+
+    As with alert dedup keys, a concurrent claim blocks until the first transaction commits
+    (and is then answered from it) or rolls back (and the claim goes through).
+    """
+    claim = (
+        pg_insert(models.ScanBulkRequest)
+        .values(idempotency_key=key, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=[models.ScanBulkRequest.idempotency_key])
+        .returning(models.ScanBulkRequest.idempotency_key)
+    )
+    if (await session.execute(claim)).scalar_one_or_none() is not None:
+        return None
+    items = (
+        await session.execute(
+            select(models.ScanBulkRequest.items).where(
+                models.ScanBulkRequest.idempotency_key == key
+            )
+        )
+    ).scalar_one()
+    return [schemas.ScanBulkItem.model_validate(item) for item in items or []]
+
+
+async def bulk_create_scans(
+    session: AsyncSession, bulk: schemas.ScanBulkCreate
+) -> tuple[list[schemas.ScanBulkItem], bool]:
+    """Ingest a parsed Nmap run; the flag is False when ``idempotency_key`` was seen before."""
+    if bulk.idempotency_key is not None:
+        earlier = await _claim_scan_bulk(session, bulk.idempotency_key)
+        if earlier is not None:
+            await session.rollback()
+            return earlier, False
+
+    hosts_by_ip: dict[str, dict[str, Any]] = {}
+    for host in bulk.hosts:
+        ip_address = host.get("ip")
+        if ip_address:
+            hosts_by_ip[ip_address] = host
+    if not hosts_by_ip:
+        await session.commit()
+        return [], True
+
+    now = datetime.utcnow()
+    asset_ids: dict[str, int] = {}
+    changed: list[dict[str, Any]] = []
+    for ip_address, host in hosts_by_ip.items():
+        hostname = host.get("hostname") or "auto-discovered"
+        os = host.get("os") or "unknown"
+        # Hosts that look the same as on a recent sweep only need their id.
+        cached = asset_cache.unchanged(ip_address, hostname, os)
+        if cached is not None:
+            asset_ids[ip_address] = cached.id
+        else:
+            changed.append(
+                {"hostname": hostname, "ip_address": ip_address, "os": os, "last_seen": now}
+            )
+    written: list[schemas.AssetRead] = []
+    for chunk in _chunks(changed):
+        result = await session.execute(_asset_upsert(list(chunk)))
+        written.extend(schemas.AssetRead.model_validate(row) for row in result.all())
+    asset_ids.update((asset.ip_address, asset.id) for asset in written)
+
+    await _lock_scan_order(session)
+    scan_ids: dict[int, int] = {}
+    scan_events: list[tuple[str, dict[str, Any]]] = []
+    for chunk in _chunks(list(hosts_by_ip.items())):
+        rows = [
+            {
+                "asset_id": asset_ids[ip_address],
+                "command": bulk.command,
+                "raw_output_path": bulk.raw_output_path,
+                "parsed_result": host,
+                "started_at": bulk.started_at,
+                "ended_at": bulk.ended_at,
+            }
+            for ip_address, host in chunk
+        ]
+        stmt = pg_insert(models.Scan).values(rows).returning(models.Scan.id, models.Scan.asset_id)
+        result = await session.execute(stmt)
+        scan_ids.update({asset_id: scan_id for scan_id, asset_id in result.all()})
+        scan_events.extend(
+            ("scan.created", _event_payload(schemas.ScanRead, {**row, "id": scan_ids[row["asset_id"]]}))
+            for row in rows
+        )
+
+    await _record_port_observations(
+        session,
+        [(asset_ids[ip_address], host) for ip_address, host in hosts_by_ip.items()],
+        bulk.started_at,
+    )
+    items = [
+        schemas.ScanBulkItem(ip_address=ip_address, asset_id=asset_id, scan_id=scan_ids[asset_id])
+        for ip_address, asset_id in asset_ids.items()
+    ]
+    if bulk.idempotency_key is not None:
+        await session.execute(
+            update(models.ScanBulkRequest)
+            .where(models.ScanBulkRequest.idempotency_key == bulk.idempotency_key)
+            .values(items=[item.model_dump() for item in items])
+        )
+    await events.publish(session, scan_events)
+    await session.commit()
+    for asset in written:
+        asset_cache.put(asset)
+    return items, True
+
+
+async def _bump_alert_counter(session: AsyncSession, severity: str, status: str, delta: int) -> None:
+    stmt = pg_insert(models.AlertCounter).values(severity=severity, status=status, count=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.AlertCounter.severity, models.AlertCounter.status],
+        set_={"count": models.AlertCounter.count + stmt.excluded.count},
+    )
+    await session.execute(stmt)
+
+
+async def _add_alert(session: AsyncSession, alert: schemas.AlertCreate) -> models.Alert:
     db_alert = models.Alert(**alert.model_dump())
     session.add(db_alert)
+    await session.flush()
+    await _bump_alert_counter(session, db_alert.severity, db_alert.status, 1)
+    await events.publish(session, [("alert.created", _event_payload(schemas.AlertRead, db_alert))])
+    return db_alert
+
+
+async def create_alert(session: AsyncSession, alert: schemas.AlertCreate) -> models.Alert:
+    db_alert = await _add_alert(session, alert)
     await session.commit()
     await session.refresh(db_alert)
     return db_alert
 
 
-async def list_alerts(session: AsyncSession, limit: int = 20) -> Sequence[models.Alert]:
+async def get_or_create_alert(
+    session: AsyncSession, alert: schemas.AlertCreate
+) -> tuple[models.Alert, bool]:
+    if alert.dedup_key is None:
+        return await create_alert(session, alert), True
+    # Claim the key first: a concurrent claim of the same key blocks here until the other
+    # transaction commits (and then reports the conflict) or rolls back (and we win).
+    claim = (
+        pg_insert(models.AlertDedup)
+        .values(dedup_key=alert.dedup_key)
+        .on_conflict_do_nothing(index_elements=[models.AlertDedup.dedup_key])
+        .returning(models.AlertDedup.dedup_key)
+    )
+    if (await session.execute(claim)).scalar_one_or_none() is None:
+        result = await session.execute(
+            select(models.Alert)
+            .join(
+                models.AlertDedup,
+                and_(
+                    models.Alert.id == models.AlertDedup.alert_id,
+                    models.Alert.created_at == models.AlertDedup.alert_created_at,
+                ),
+            )
+            .where(models.AlertDedup.dedup_key == alert.dedup_key)
+        )
+        return result.scalar_one(), False
+    db_alert = await _add_alert(session, alert)
+    await session.execute(
+        update(models.AlertDedup)
+        .where(models.AlertDedup.dedup_key == alert.dedup_key)
+        .values(alert_id=db_alert.id, alert_created_at=db_alert.created_at)
+    )
+    await session.commit()
+    await session.refresh(db_alert)
+    return db_alert, True
+
+
+async def update_alert_status(
+    session: AsyncSession, alert_id: int, status: str
+) -> models.Alert | None:
+    result = await session.execute(
+        select(models.Alert).where(models.Alert.id == alert_id).with_for_update()
+    )
+    db_alert = result.scalar_one_or_none()
+    if db_alert is None or db_alert.status == status:
+        return db_alert
+    await _bump_alert_counter(session, db_alert.severity, db_alert.status, -1)
+    await _bump_alert_counter(session, db_alert.severity, status, 1)
+    db_alert.status = status
+    await session.flush()
+    await events.publish(session, [("alert.updated", _event_payload(schemas.AlertRead, db_alert))])
+    await session.commit()
+    return db_alert
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("malformed cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("malformed cursor")
+    return values
+
+
+async def list_alerts(
+    session: AsyncSession,
+    limit: int = 20,
+    cursor: str | None = None,
+    severity: str | None = None,
+    status: str | None = None,
+    asset_id: int | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    feature: str | None = None,
+    details: dict[str, Any] | list[Any] | None = None,
+) -> tuple[Sequence[models.Alert], str | None]:
+    # Newest first, keyed on (created_at, id): each page is an index range scan that starts
+    # where the previous page ended, so page 1000 costs the same as page 1.
+    query = select(models.Alert)
+    if severity is not None:
+        query = query.where(models.Alert.severity == severity)
+    if status is not None:
+        query = query.where(models.Alert.status == status)
+    if asset_id is not None:
+        query = query.where(models.Alert.asset_id == asset_id)
+    if created_after is not None:
+        query = query.where(models.Alert.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(models.Alert.created_at < created_before)
+    # JSONB containment (@>) is answered from the GIN indexes on details/explanation.
+    if feature is not None:
+        query = query.where(
+            models.Alert.explanation.contains({"feature_importance": [{"feature": feature}]})
+        )
+    if details is not None:
+        query = query.where(models.Alert.details.contains(details))
+    if cursor is not None:
+        try:
+            created_at, alert_id = decode_cursor(cursor)
+            key = (datetime.fromisoformat(created_at), int(alert_id))
+        except (TypeError, ValueError) as exc:
+            raise ValueError("malformed cursor") from exc
+        query = query.where(tuple_(models.Alert.created_at, models.Alert.id) < key)
+    query = query.order_by(models.Alert.created_at.desc(), models.Alert.id.desc()).limit(limit + 1)
+
+    alerts = (await session.execute(query)).scalars().all()
+    if len(alerts) <= limit:
+        return alerts, None
+    alerts = alerts[:limit]
+    return alerts, encode_cursor(alerts[-1].created_at, alerts[-1].id)
+
+
+def _port_document(port: int | None, service: str | None, state: str) -> dict[str, Any] | None:
+    if port is None and service is None:
+        return None
+    entry: dict[str, Any] = {"state": state}
+    if port is not None:
+        entry["port"] = port
+    if service is not None:
+        entry["service"] = service
+    return {"ports": [entry]}
+
+
+async def list_exposed_assets(
+    session: AsyncSession,
+    port: int | None = None,
+    service: str | None = None,
+    port_state: str = "open",
+    since: datetime | None = None,
+    limit: int = 500,
+) -> Sequence[models.Asset]:
+    """Assets with at least one scan (since ``since``) reporting the port/service."""
+    port_document = _port_document(port, service, port_state)
+    scans = select(models.Scan.asset_id)
+    if port_document is not None:
+        scans = scans.where(models.Scan.parsed_result.contains(port_document))
+    if since is not None:
+        scans = scans.where(models.Scan.started_at >= since)
     result = await session.execute(
-        select(models.Alert).order_by(models.Alert.created_at.desc()).limit(limit)
+        select(models.Asset).where(models.Asset.id.in_(scans)).order_by(models.Asset.id).limit(limit)
     )
     return result.scalars().all()
 
 
-async def list_scans(session: AsyncSession, limit: int = 20) -> Sequence[models.Scan]:
-    result = await session.execute(select(models.Scan).order_by(models.Scan.id.desc()).limit(limit))
+async def list_assets(
+    session: AsyncSession,
+    limit: int = 100,
+    cursor: str | None = None,
+    subnet: str | None = None,
+) -> tuple[Sequence[models.Asset], str | None]:
+    """Assets by id, optionally only those whose address lies in ``subnet`` (CIDR)."""
+    query = select(models.Asset)
+    if subnet is not None:
+        query = query.where(models.Asset.ip_inet.op("<<=")(cast(subnet, CIDR)))
+    if cursor is not None:
+        try:
+            (asset_id,) = decode_cursor(cursor)
+            key = int(asset_id)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("malformed cursor") from exc
+        query = query.where(models.Asset.id > key)
+    result = await session.execute(query.order_by(models.Asset.id).limit(limit + 1))
+    assets = result.scalars().all()
+    if len(assets) <= limit:
+        return assets, None
+    assets = assets[:limit]
+    return assets, encode_cursor(assets[-1].id)
+
+
+async def list_asset_risk(
+    session: AsyncSession, after_id: int = 0, limit: int = 1000, since: datetime | None = None
+) -> Sequence[Any]:
+    """Each asset with its latest alert (score, severity, time), ordered by asset id."""
+    latest = (
+        select(
+            models.Alert.score,
+            models.Alert.severity,
+            models.Alert.created_at.label("alerted_at"),
+        )
+        .where(models.Alert.asset_id == models.Asset.id)
+        .order_by(models.Alert.created_at.desc())
+        .limit(1)
+    )
+    if since is not None:
+        latest = latest.where(models.Alert.created_at >= since)
+    latest = latest.lateral()
+    result = await session.execute(
+        select(
+            models.Asset.id.label("asset_id"),
+            models.Asset.ip_address,
+            latest.c.score,
+            latest.c.severity,
+            latest.c.alerted_at,
+        )
+        .outerjoin(latest, true())
+        .where(models.Asset.id > after_id)
+        .order_by(models.Asset.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def list_scans(
+    session: AsyncSession,
+    limit: int = 20,
+    cursor: str | None = None,
+    asset_id: int | None = None,
+    started_after: datetime | None = None,
+    started_before: datetime | None = None,
+    port: int | None = None,
+    service: str | None = None,
+    port_state: str = "open",
+    parsed_result: dict[str, Any] | list[Any] | None = None,
+) -> tuple[Sequence[models.Scan], str | None]:
+    # Newest first, keyed on id (see list_alerts).
+    query = select(models.Scan)
+    if asset_id is not None:
+        query = query.where(models.Scan.asset_id == asset_id)
+    if started_after is not None:
+        query = query.where(models.Scan.started_at >= started_after)
+    if started_before is not None:
+        query = query.where(models.Scan.started_at < started_before)
+    port_document = _port_document(port, service, port_state)
+    if port_document is not None:
+        query = query.where(models.Scan.parsed_result.contains(port_document))
+    if parsed_result is not None:
+        query = query.where(models.Scan.parsed_result.contains(parsed_result))
+    if cursor is not None:
+        try:
+            (scan_id,) = decode_cursor(cursor)
+            key = int(scan_id)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("malformed cursor") from exc
+        query = query.where(models.Scan.id < key)
+    query = query.order_by(models.Scan.id.desc()).limit(limit + 1)
+
+    scans = (await session.execute(query)).scalars().all()
+    if len(scans) <= limit:
+        return scans, None
+    scans = scans[:limit]
+    return scans, encode_cursor(scans[-1].id)
+
+
+async def list_port_observations(
+    session: AsyncSession,
+    limit: int = 100,
+    cursor: str | None = None,
+    port: int | None = None,
+    service: str | None = None,
+    state: str | None = None,
+    asset_id: int | None = None,
+    changed_since: datetime | None = None,
+) -> tuple[Sequence[models.PortObservation], str | None]:
+    # Ordered by primary key (asset_id, port, protocol) and paged on it like list_alerts.
+    table = models.PortObservation
+    query = select(table)
+    if port is not None:
+        query = query.where(table.port == port)
+    if service is not None:
+        query = query.where(table.service == service)
+    if state is not None:
+        query = query.where(table.state == state)
+    if asset_id is not None:
+        query = query.where(table.asset_id == asset_id)
+    if changed_since is not None:
+        query = query.where(table.state_changed_at >= changed_since)
+    if cursor is not None:
+        try:
+            cursor_asset_id, cursor_port, cursor_protocol = decode_cursor(cursor)
+            key = (int(cursor_asset_id), int(cursor_port), str(cursor_protocol))
+        except (TypeError, ValueError) as exc:
+            raise ValueError("malformed cursor") from exc
+        query = query.where(tuple_(table.asset_id, table.port, table.protocol) > key)
+    query = query.order_by(table.asset_id, table.port, table.protocol).limit(limit + 1)
+
+    observations = (await session.execute(query)).scalars().all()
+    if len(observations) <= limit:
+        return observations, None
+    observations = observations[:limit]
+    last = observations[-1]
+    return observations, encode_cursor(last.asset_id, last.port, last.protocol)
+
+
+async def list_scans_after(
+    session: AsyncSession, after_id: int = 0, limit: int = 100
+) -> Sequence[models.Scan]:
+    """Scans in commit order; ids are allocated under _lock_scan_order, so an id cursor has no gaps."""
+    result = await session.execute(
+        select(models.Scan).where(models.Scan.id > after_id).order_by(models.Scan.id).limit(limit)
+    )
     return result.scalars().all()
 
 
@@ -69,46 +667,82 @@ async def create_action_log(
 ) -> models.ActionLog:
     db_action = models.ActionLog(**action_log.model_dump())
     session.add(db_action)
+    await session.flush()
+    await events.publish(
+        session, [("action.created", _event_payload(schemas.ActionLogRead, db_action))]
+    )
     await session.commit()
     await session.refresh(db_action)
     return db_action
 
 
-async def get_dashboard_summary(session: AsyncSession) -> schemas.DashboardSummary:
-    alerts_result = await session.execute(select(func.count()).select_from(models.Alert))
-    total_alerts = alerts_result.scalar_one() or 0
-
-    severity_counts = await session.execute(
-        select(models.Alert.severity, func.count(models.Alert.id)).group_by(models.Alert.severity)
+async def bulk_create_action_logs(
+    session: AsyncSession, action_logs: Sequence[schemas.ActionLogCreate]
+) -> list[models.ActionLog]:
+    db_actions = [models.ActionLog(**action_log.model_dump()) for action_log in action_logs]
+    session.add_all(db_actions)
+    await session.flush()
+    await events.publish(
+        session, [("action.created", _event_payload(schemas.ActionLogRead, action)) for action in db_actions]
     )
-    counts = {severity: count for severity, count in severity_counts}
+    await session.commit()
+    return db_actions
+
+
+DASHBOARD_QUERY = text(
+    """
+    SELECT
+        (SELECT coalesce(max(id), 0) FROM events) AS event_cursor,
+        (SELECT coalesce(json_object_agg(severity, total), '{}')
+           FROM (SELECT severity, sum(count) AS total FROM alert_counters GROUP BY severity) c
+        ) AS counts,
+        (SELECT coalesce(json_agg(a ORDER BY a.created_at DESC), '[]')
+           FROM (SELECT id, asset_id, created_at, severity, score, summary, details,
+                        explanation, status, dedup_key
+                   FROM alerts ORDER BY created_at DESC LIMIT 5) a
+        ) AS latest_alerts,
+        (SELECT coalesce(json_agg(s ORDER BY s.started_at DESC), '[]')
+           FROM (SELECT id, asset_id, started_at, ended_at, command, raw_output_path, parsed_result
+                   FROM scans ORDER BY started_at DESC LIMIT 5) s
+        ) AS recent_scans,
+        (SELECT coalesce(json_agg(x ORDER BY x.executed_at DESC), '[]')
+           FROM (SELECT id, alert_id, action_type, executed_at, details
+                   FROM action_logs ORDER BY executed_at DESC LIMIT 5) x
+        ) AS automated_actions
+    """
+).columns(
+    event_cursor=Integer,
+    counts=JSON,
+    latest_alerts=JSON,
+    recent_scans=JSON,
+    automated_actions=JSON,
+)
 
-    latest_alerts = await session.execute(
-        select(models.Alert).order_by(models.Alert.created_at.desc()).limit(5)
-    )
-    recent_scans = await session.execute(
-        select(models.Scan).order_by(models.Scan.started_at.desc()).limit(5)
-    )
-    recent_actions = await session.execute(
-        select(models.ActionLog).order_by(models.ActionLog.executed_at.desc()).limit(5)
-    )
 
-    high = counts.get("high", 0)
-    medium = counts.get("medium", 0)
-    low = counts.get("low", 0)
+async def get_dashboard_snapshot(session: AsyncSession) -> tuple[schemas.DashboardSummary, int]:
+    # A single statement reads one consistent snapshot: an alert is either counted in the
+    # summary or delivered after the returned event cursor, never both.
+    row = (await session.execute(DASHBOARD_QUERY)).one()
+    counts = {severity: int(total) for severity, total in row.counts.items()}
 
     ai_insights = {
         "top_signals": ["exposed_ssh", "anonymous_ftp"],
         "model_version": "0.1.0",
     }
 
-    return schemas.DashboardSummary(
-        vulnerabilities_detected=total_alerts,
-        high_count=high,
-        medium_count=medium,
-        low_count=low,
+    summary = schemas.DashboardSummary(
+        vulnerabilities_detected=sum(counts.values()),
+        high_count=counts.get("high", 0),
+        medium_count=counts.get("medium", 0),
+        low_count=counts.get("low", 0),
         ai_insights=ai_insights,
-        recent_scans=[schemas.ScanRead.model_validate(scan) for scan in recent_scans.scalars().all()],
-        latest_alerts=[schemas.AlertRead.model_validate(alert) for alert in latest_alerts.scalars().all()],
-        automated_actions=[schemas.ActionLogRead.model_validate(action) for action in recent_actions.scalars().all()],
+        recent_scans=row.recent_scans,
+        latest_alerts=row.latest_alerts,
+        automated_actions=row.automated_actions,
     )
+    return summary, row.event_cursor
+
+
+async def get_dashboard_summary(session: AsyncSession) -> schemas.DashboardSummary:
+    summary, _ = await get_dashboard_snapshot(session)
+    return summary
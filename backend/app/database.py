@@ -1,14 +1,85 @@
+from __future__ import annotations
+
+import time
 from collections.abc import AsyncIterator
+from dataclasses import dataclass
 
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .config import settings
 
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+
+@dataclass
+class PoolMetrics:
+    waiting: int = 0
+    acquisitions: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait, including connect time for new ones."""
+
+    def _do_get(self):  # type: ignore[no-untyped-def]
+        pool_metrics.waiting += 1
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.waiting -= 1
+        waited = time.perf_counter() - started
+        pool_metrics.acquisitions += 1
+        pool_metrics.wait_seconds_total += waited
+        pool_metrics.wait_seconds_max = max(pool_metrics.wait_seconds_max, waited)
+        return connection
+
+
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    future=True,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    # SQLAlchemy keeps its own per-connection cache of asyncpg prepared statements; asyncpg's
+    # cache only serves raw driver calls. Both must be 0 behind a transaction-mode pgbouncer.
+    connect_args={
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "statement_cache_size": settings.db_statement_cache_size,
+    },
+)
 
 SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+def pool_status() -> dict[str, float | int]:
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # QueuePool reports overflow as negative until the base pool is full.
+        "overflow": max(pool.overflow(), 0),
+        "waiting": pool_metrics.waiting,
+        "acquisitions": pool_metrics.acquisitions,
+        "timeouts": pool_metrics.timeouts,
+        "avg_wait_ms": 1000 * pool_metrics.wait_seconds_total / max(pool_metrics.acquisitions, 1),
+        "max_wait_ms": 1000 * pool_metrics.wait_seconds_max,
+    }
+
+
 async def get_session() -> AsyncIterator[AsyncSession]:
     async with SessionLocal() as session:
         yield session
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Callable, Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .config import settings
+from .database import SessionLocal, engine
+
+CHANNEL = "soc_events"
+REPLAY_PAGE_SIZE = 500
+SUBSCRIBER_QUEUE_SIZE = 1000
+ORDER_LOCK_ID = 0x50C0_E7E0
+
+
+async def publish(session: AsyncSession, events: Iterable[tuple[str, dict[str, Any]]]) -> None:
+    """Record events in the caller's transaction; NOTIFY is delivered only when it commits.
+
+    Ids are allocated under an advisory lock held until commit, so events become visible in
+    id order and an ``id > cursor`` reader never steps past one that commits late. Publishers
+    queue on that lock until commit, so this should be the transaction's last write.
+    """
+    rows = [{"topic": topic, "payload": payload} for topic, payload in events]
+    if not rows:
+        return
+    await session.execute(select(func.pg_advisory_xact_lock(ORDER_LOCK_ID)))
+    await session.execute(insert(models.Event), rows)
+    await session.execute(select(func.pg_notify(CHANNEL, "")))
+
+
+def format_sse(event: dict[str, Any] | None) -> str:
+    if event is None:
+        return ": keepalive\n\n"
+    return f"id: {event['id']}\nevent: {event['topic']}\ndata: {json.dumps(event['payload'])}\n\n"
+
+
+def _as_dict(event: models.Event) -> dict[str, Any]:
+    return {"id": event.id, "topic": event.topic, "payload": event.payload}
+
+
+class EventBroker:
+    """Fans committed events out to in-process subscribers.
+
+    Every backend process LISTENs on the channel, so writes from any worker reach every
+    subscriber; the events table doubles as the replay log for resumable cursors.
+    """
+
+    def __init__(self) -> None:
+        self.last_id = 0
+        self._subscribers: set[asyncio.Queue[dict[str, Any] | None]] = set()
+        self._listeners: list[Callable[[dict[str, Any]], None]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def add_listener(self, listener: Callable[[dict[str, Any]], None]) -> None:
+        self._listeners.append(listener)
+
+    async def start(self) -> None:
+        async with SessionLocal() as session:
+            self.last_id = (await session.execute(select(func.max(models.Event.id)))).scalar() or 0
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Event listener failed, reconnecting: {}", exc)
+                await asyncio.sleep(settings.event_poll_interval)
+
+    async def _listen(self) -> None:
+        async with engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            wake = asyncio.Event()
+            await raw_connection.driver_connection.add_listener(CHANNEL, lambda *_: wake.set())
+            last_pruned = datetime.min
+            while True:
+                await self._dispatch_new()
+                if datetime.utcnow() - last_pruned > timedelta(hours=1):
+                    await self._prune()
+                    last_pruned = datetime.utcnow()
+                # The timeout doubles as a catch-up poll in case a notification was missed.
+                try:
+                    await asyncio.wait_for(wake.wait(), settings.event_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+
+    async def _dispatch_new(self) -> None:
+        async with SessionLocal() as session:
+            while True:
+                result = await session.execute(
+                    select(models.Event)
+                    .where(models.Event.id > self.last_id)
+                    .order_by(models.Event.id)
+                    .limit(REPLAY_PAGE_SIZE)
+                )
+                events = [_as_dict(event) for event in result.scalars().all()]
+                for event in events:
+                    self._fan_out(event)
+                    self.last_id = event["id"]
+                if len(events) < REPLAY_PAGE_SIZE:
+                    return
+
+    def _fan_out(self, event: dict[str, Any]) -> None:
+        for listener in self._listeners:
+            listener(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled consumer is cut off; it resumes from its cursor when it reconnects.
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _prune(self) -> None:
+        cutoff = datetime.utcnow() - timedelta(hours=settings.event_retention_hours)
+        async with SessionLocal() as session:
+            await session.execute(delete(models.Event).where(models.Event.created_at < cutoff))
+            await session.commit()
+
+    async def _replay(self, after_id: int, until_id: int) -> AsyncIterator[dict[str, Any]]:
+        async with SessionLocal() as session:
+            while after_id < until_id:
+                result = await session.execute(
+                    select(models.Event)
+                    .where(models.Event.id > after_id, models.Event.id <= until_id)
+                    .order_by(models.Event.id)
+                    .limit(REPLAY_PAGE_SIZE)
+                )
+                events = result.scalars().all()
+                if not events:
+                    return
+                for event in events:
+                    yield _as_dict(event)
+                after_id = events[-1].id
+
+    async def subscribe(
+        self, after_id: int | None = None, topics: set[str] | None = None
+    ) -> AsyncIterator[dict[str, Any] | None]:
+        """Yield events after ``after_id`` (or only new ones), and ``None`` as a heartbeat."""
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            cursor = self.last_id if after_id is None else after_id
+            async for event in self._replay(cursor, self.last_id):
+                cursor = event["id"]
+                if topics is None or event["topic"] in topics:
+                    yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.event_heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    return
+                if event["id"] <= cursor:
+                    continue
+                cursor = event["id"]
+                if topics is None or event["topic"] in topics:
+                    yield event
+        finally:
+            self._subscribers.discard(queue)
+
+
+broker = EventBroker()
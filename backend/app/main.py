@@ -4,11 +4,17 @@ from datetime import datetime, timedelta
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import func, select
 
 from . import crud, schemas
 from .api.routes import router as api_router
+from .cache import dashboard_cache
 from .config import settings
-from .database import SessionLocal
+from .database import SessionLocal, engine
+from .events import broker
+from .partitions import maintainer
+
+SEED_LOCK_ID = 0x50C0_5EED
 
 app = FastAPI(title="Trusted AI SOC Lite API", version="0.1.0")
 
@@ -22,17 +28,13 @@ app.add_middleware(
 app.include_router(api_router)
 
 
-@app.on_event("startup")
-async def on_startup() -> None:
-    async with SessionLocal() as session:
-        await crud.init_models(session)
-
+async def seed_demo_data() -> None:
     async with SessionLocal() as session:
         asset = await crud.upsert_asset(
             session,
             asset=schemas.AssetCreate(hostname="demo-host", ip_address="192.168.1.10", os="Debian"),
         )
-        scans = await crud.list_scans(session)
+        scans, _ = await crud.list_scans(session, limit=1)
         if not scans:
             await crud.create_scan(
                 session,
@@ -50,7 +52,7 @@ async def on_startup() -> None:
                     ended_at=datetime.utcnow(),
                 ),
             )
-        alerts = await crud.list_alerts(session)
+        alerts, _ = await crud.list_alerts(session, limit=1)
         if not alerts:
             alert = await crud.create_alert(
                 session,
@@ -78,6 +80,32 @@ async def on_startup() -> None:
             )
 
 
+@app.on_event("startup")
+async def on_startup() -> None:
+    async with SessionLocal() as session:
+        await crud.init_models(session)
+
+    # Workers start concurrently; hold a session-level lock so only the first one seeds.
+    async with engine.connect() as lock_conn:
+        await lock_conn.execute(select(func.pg_advisory_lock(SEED_LOCK_ID)))
+        try:
+            await seed_demo_data()
+        finally:
+            await lock_conn.execute(select(func.pg_advisory_unlock(SEED_LOCK_ID)))
+
+    # Every committed write emits an event in every backend process, so this keeps each
+    # worker's cached dashboard coherent without cross-process coordination.
+    broker.add_listener(lambda _event: dashboard_cache.invalidate())
+    await broker.start()
+    await maintainer.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await maintainer.stop()
+    await broker.stop()
+
+
 @app.get("/")
 async def root() -> dict[str, str]:
     return {"message": "Trusted AI SOC Lite backend is running"}
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import JSON, ForeignKey, Integer, String
+from sqlalchemy import JSON, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import INET, JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -17,51 +18,184 @@ class Asset(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     hostname: Mapped[str] = mapped_column(String(255), nullable=False)
     ip_address: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    # ip_address parsed as inet (NULL when it is not an address) for subnet queries.
+    ip_inet: Mapped[Optional[str]] = mapped_column(INET, nullable=True)
     os: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
     last_seen: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     scans: Mapped[list[Scan]] = relationship(back_populates="asset", cascade="all, delete-orphan")
     alerts: Mapped[list[Alert]] = relationship(back_populates="asset", cascade="all, delete-orphan")
 
+    # inet_ops makes `ip_inet <<= '10.2.0.0/16'` an index range scan.
+    __table_args__ = (
+        Index(
+            "ix_assets_ip_inet",
+            "ip_inet",
+            postgresql_using="gist",
+            postgresql_ops={"ip_inet": "inet_ops"},
+        ),
+    )
+
 
 class Scan(Base):
     __tablename__ = "scans"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # Partitioned by started_at (see partitions.py); the partition key has to be part of the PK.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
     asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"))
-    started_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    started_at: Mapped[datetime] = mapped_column(primary_key=True, default=datetime.utcnow)
     ended_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     command: Mapped[str] = mapped_column(String(512))
     raw_output_path: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
-    parsed_result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    parsed_result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
 
     asset: Mapped[Asset] = relationship(back_populates="scans")
 
+    # Keyset pagination walks scans by id, optionally scoped to an asset or a time range.
+    __table_args__ = (
+        Index("ix_scans_asset_id_id", "asset_id", "id"),
+        Index("ix_scans_started_at_id", "started_at", "id"),
+        # jsonb_path_ops: smaller and faster than the default opclass, and @> is all we query with.
+        Index(
+            "ix_scans_parsed_result",
+            "parsed_result",
+            postgresql_using="gin",
+            postgresql_ops={"parsed_result": "jsonb_path_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (started_at)"},
+    )
+
 
 class Alert(Base):
     __tablename__ = "alerts"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # Partitioned by created_at (see partitions.py); the partition key has to be part of the PK.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
     asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="SET NULL"), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, index=True)
+    created_at: Mapped[datetime] = mapped_column(primary_key=True, default=datetime.utcnow, index=True)
     severity: Mapped[str] = mapped_column(String(32), default="low")
     score: Mapped[float] = mapped_column(default=0.0)
     summary: Mapped[str] = mapped_column(String(512))
-    details: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    explanation: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    details: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    explanation: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     status: Mapped[str] = mapped_column(String(32), default="open")
+    # Uniqueness lives in AlertDedup: a unique index on a partitioned table must include created_at.
+    dedup_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     asset: Mapped[Optional[Asset]] = relationship(back_populates="alerts")
-    actions: Mapped[list[ActionLog]] = relationship(back_populates="alert", cascade="all, delete-orphan")
+    actions: Mapped[list[ActionLog]] = relationship(
+        back_populates="alert",
+        primaryjoin="Alert.id == foreign(ActionLog.alert_id)",
+        viewonly=True,
+    )
+
+    # Keyset pagination walks alerts by (created_at, id), optionally narrowed by one filter.
+    __table_args__ = (
+        Index("ix_alerts_created_at_id", "created_at", "id"),
+        Index("ix_alerts_severity_created_at_id", "severity", "created_at", "id"),
+        Index("ix_alerts_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_alerts_asset_id_created_at_id", "asset_id", "created_at", "id"),
+        Index(
+            "ix_alerts_details",
+            "details",
+            postgresql_using="gin",
+            postgresql_ops={"details": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_alerts_explanation",
+            "explanation",
+            postgresql_using="gin",
+            postgresql_ops={"explanation": "jsonb_path_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class AlertDedup(Base):
+    __tablename__ = "alert_dedup"
+
+    dedup_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    alert_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    alert_created_at: Mapped[Optional[datetime]] = mapped_column(nullable=True, index=True)
+
+
+class ScanBulkRequest(Base):
+    """Idempotency keys of accepted /scans:bulk requests, with the response they produced."""
+
+    __tablename__ = "scan_bulk_requests"
+
+    idempotency_key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, index=True)
+    items: Mapped[list | None] = mapped_column(JSONB, nullable=True)
+
+
+class AlertCounter(Base):
+    __tablename__ = "alert_counters"
+
+    severity: Mapped[str] = mapped_column(String(32), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
 
 
 class ActionLog(Base):
     __tablename__ = "action_logs"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    alert_id: Mapped[int] = mapped_column(ForeignKey("alerts.id", ondelete="CASCADE"))
+    # Partitioned by executed_at. alerts.id alone is not unique once alerts is partitioned, so
+    # alert_id is a plain reference that outlives the alert's partition by its own retention.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, index=True)
+    alert_id: Mapped[int] = mapped_column(Integer, index=True)
     action_type: Mapped[str] = mapped_column(String(64))
-    executed_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    executed_at: Mapped[datetime] = mapped_column(primary_key=True, default=datetime.utcnow)
     details: Mapped[dict | None] = mapped_column(JSON, nullable=True)
 
-    alert: Mapped[Alert] = relationship(back_populates="actions")
+    alert: Mapped[Optional[Alert]] = relationship(
+        back_populates="actions",
+        primaryjoin="foreign(ActionLog.alert_id) == Alert.id",
+        viewonly=True,
+    )
+
+    __table_args__ = ({"postgresql_partition_by": "RANGE (executed_at)"},)
+
+
+class ScanRollup(Base):
+    """One row per asset and day, kept after the day's scan partition is dropped."""
+
+    __tablename__ = "scan_rollups"
+
+    asset_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+    scan_count: Mapped[int] = mapped_column(Integer)
+    first_started_at: Mapped[datetime]
+    last_started_at: Mapped[datetime]
+    last_parsed_result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+
+class PortObservation(Base):
+    """Latest known state of one port on one asset, upserted from every scan."""
+
+    __tablename__ = "port_observations"
+
+    asset_id: Mapped[int] = mapped_column(
+        ForeignKey("assets.id", ondelete="CASCADE"), primary_key=True
+    )
+    port: Mapped[int] = mapped_column(Integer, primary_key=True)
+    protocol: Mapped[str] = mapped_column(String(8), primary_key=True)
+    service: Mapped[str] = mapped_column(String(64))
+    state: Mapped[str] = mapped_column(String(32))
+    first_seen: Mapped[datetime]
+    last_seen: Mapped[datetime]
+    state_changed_at: Mapped[datetime] = mapped_column(index=True)
+
+    __table_args__ = (
+        Index("ix_port_observations_port_state", "port", "state", "asset_id"),
+        Index("ix_port_observations_service_state", "service", "state", "asset_id"),
+    )
+
+
+class Event(Base):
+    __tablename__ = "events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    topic: Mapped[str] = mapped_column(String(64), index=True)
+    payload: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, index=True)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from loguru import logger
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .config import settings
+from .database import engine
+
+# Shared by every backend process so only one of them migrates or maintains partitions at a time.
+MAINTENANCE_LOCK_ID = 0x50C0_0017
+
+
+@dataclass(frozen=True)
+class PartitionPolicy:
+    """Range partitioning of one table by a timestamp column.
+
+    ``before_drop`` statements run against an expired partition (``{partition}``) after it has
+    been detached and before it is dropped; ``on_restore`` runs once after rows from a
+    pre-partitioning table have been copied in.
+    """
+
+    table: str
+    column: str
+    interval: str  # "day" or "month"
+    retention_days: int
+    before_drop: tuple[str, ...] = ()
+    on_restore: tuple[str, ...] = ()
+
+
+SCAN_ROLLUP = """
+    INSERT INTO scan_rollups
+        (asset_id, day, scan_count, first_started_at, last_started_at, last_parsed_result)
+    SELECT DISTINCT ON (asset_id, started_at::date)
+           asset_id, started_at::date,
+           count(*) OVER w, min(started_at) OVER w, max(started_at) OVER w, parsed_result
+      FROM {partition}
+    WINDOW w AS (PARTITION BY asset_id, started_at::date)
+     ORDER BY asset_id, started_at::date, started_at DESC
+    ON CONFLICT (asset_id, day) DO NOTHING
+"""
+
+ALERT_COUNTERS_RELEASE = """
+    UPDATE alert_counters AS c SET count = c.count - d.n
+      FROM (SELECT severity, status, count(*) AS n FROM {partition} GROUP BY severity, status) AS d
+     WHERE c.severity = d.severity AND c.status = d.status
+"""
+
+ALERT_DEDUP_RELEASE = """
+    DELETE FROM alert_dedup AS d USING {partition} AS a
+     WHERE d.alert_id = a.id AND d.alert_created_at = a.created_at
+"""
+
+ALERT_DEDUP_BACKFILL = """
+    INSERT INTO alert_dedup (dedup_key, alert_id, alert_created_at)
+    SELECT DISTINCT ON (dedup_key) dedup_key, id, created_at
+      FROM alerts WHERE dedup_key IS NOT NULL
+     ORDER BY dedup_key, created_at
+    ON CONFLICT (dedup_key) DO NOTHING
+"""
+
+POLICIES = (
+    PartitionPolicy(
+        "scans", "started_at", "day", settings.scan_retention_days, before_drop=(SCAN_ROLLUP,)
+    ),
+    PartitionPolicy(
+        "alerts",
+        "created_at",
+        "month",
+        settings.alert_retention_days,
+        before_drop=(ALERT_COUNTERS_RELEASE, ALERT_DEDUP_RELEASE),
+        on_restore=(ALERT_DEDUP_BACKFILL,),
+    ),
+    PartitionPolicy("action_logs", "executed_at", "month", settings.action_log_retention_days),
+)
+
+_SUFFIX_FORMATS = {"day": "%Y%m%d", "month": "%Y%m"}
+
+
+def _floor(value: date, interval: str) -> date:
+    return value if interval == "day" else value.replace(day=1)
+
+
+def _next(start: date, interval: str) -> date:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def _partition_name(policy: PartitionPolicy, start: date) -> str:
+    return f"{policy.table}_p{start.strftime(_SUFFIX_FORMATS[policy.interval])}"
+
+
+def _partition_start(policy: PartitionPolicy, name: str) -> date | None:
+    match = re.fullmatch(rf"{policy.table}_p(\d+)", name)
+    if match is None:
+        return None
+    try:
+        return datetime.strptime(match.group(1), _SUFFIX_FORMATS[policy.interval]).date()
+    except ValueError:
+        return None
+
+
+async def try_lock(conn: AsyncConnection) -> bool:
+    result = await conn.execute(select(func.pg_try_advisory_xact_lock(MAINTENANCE_LOCK_ID)))
+    return bool(result.scalar())
+
+
+async def ensure_partitions(
+    conn: AsyncConnection, policy: PartitionPolicy, since: datetime | None = None
+) -> None:
+    """Create partitions from ``since`` (default: now) through the pre-make horizon."""
+    today = datetime.utcnow().date()
+    start = _floor((since or datetime.utcnow()).date(), policy.interval)
+    horizon = today + timedelta(days=settings.partition_premake_days)
+    await conn.execute(
+        text(f"CREATE TABLE IF NOT EXISTS {policy.table}_default PARTITION OF {policy.table} DEFAULT")
+    )
+    while start <= horizon:
+        end = _next(start, policy.interval)
+        name = _partition_name(policy, start)
+        try:
+            async with conn.begin_nested():
+                await conn.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {policy.table} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                    )
+                )
+        except DBAPIError as exc:
+            # Rows for this range already sit in the default partition; they stay there.
+            logger.warning("Could not create partition {}: {}", name, exc)
+        start = end
+
+
+async def detach_unpartitioned(conn: AsyncConnection) -> list[PartitionPolicy]:
+    """Move plain tables from before partitioning aside so create_all can rebuild them."""
+    moved = []
+    for policy in POLICIES:
+        # relkind is a "char", which asyncpg returns as bytes; compare its text form.
+        relkind = (
+            await conn.execute(
+                text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": policy.table},
+            )
+        ).scalar()
+        if relkind != "r":
+            continue
+        logger.info("Converting {} to a partitioned table", policy.table)
+        await conn.execute(text(f"CREATE TABLE {policy.table}_unpartitioned AS TABLE {policy.table}"))
+        await conn.execute(text(f"DROP TABLE {policy.table} CASCADE"))
+        moved.append(policy)
+    return moved
+
+
+async def restore_unpartitioned(conn: AsyncConnection, moved: list[PartitionPolicy]) -> None:
+    for policy in moved:
+        source = f"{policy.table}_unpartitioned"
+        oldest = (await conn.execute(text(f"SELECT min({policy.column}) FROM {source}"))).scalar()
+        if oldest is not None:
+            await ensure_partitions(conn, policy, since=oldest)
+        result = await conn.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :target "
+                "AND column_name IN (SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :source) "
+                "ORDER BY ordinal_position"
+            ),
+            {"target": policy.table, "source": source},
+        )
+        columns = ", ".join(result.scalars().all())
+        await conn.execute(text(f"INSERT INTO {policy.table} ({columns}) SELECT {columns} FROM {source}"))
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{policy.table}', 'id'), "
+                f"coalesce(max(id), 0) + 1, false) FROM {policy.table}"
+            )
+        )
+        for statement in policy.on_restore:
+            await conn.execute(text(statement))
+        await conn.execute(text(f"DROP TABLE {source}"))
+
+
+async def _expire(policy: PartitionPolicy) -> None:
+    cutoff = (datetime.utcnow() - timedelta(days=policy.retention_days)).date()
+
+    # Detaching needs a brief exclusive lock on the parent, so it commits on its own and the
+    # slower rollup/drop below runs against a table no query can see any more.
+    async with engine.begin() as conn:
+        if not await try_lock(conn):
+            return
+        await conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        attached = await conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table)"
+            ),
+            {"table": policy.table},
+        )
+        for name in attached.scalars().all():
+            start = _partition_start(policy, name)
+            if start is None or _next(start, policy.interval) > cutoff:
+                continue
+            try:
+                async with conn.begin_nested():
+                    await conn.execute(text(f"ALTER TABLE {policy.table} DETACH PARTITION {name}"))
+            except DBAPIError as exc:
+                logger.warning("Could not detach {}, retrying next cycle: {}", name, exc)
+
+    # Detached partitions are also picked up here after a crash between the two transactions.
+    async with engine.begin() as conn:
+        if not await try_lock(conn):
+            return
+        detached = await conn.execute(
+            text(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+                "AND relnamespace = current_schema()::regnamespace AND relname ~ :pattern"
+            ),
+            {"pattern": rf"^{policy.table}_p\d+$"},
+        )
+        for name in detached.scalars().all():
+            for statement in policy.before_drop:
+                await conn.execute(text(statement.format(partition=name)))
+            await conn.execute(text(f"DROP TABLE {name}"))
+            logger.info("Dropped expired partition {}", name)
+
+
+async def maintain() -> None:
+    async with engine.begin() as conn:
+        if not await try_lock(conn):
+            return
+        for policy in POLICIES:
+            await ensure_partitions(conn, policy)
+        if settings.scan_retention_days > 0:
+            # A scan bulk idempotency key is not needed once the scans it guards have expired.
+            await conn.execute(
+                text("DELETE FROM scan_bulk_requests WHERE created_at < :cutoff"),
+                {"cutoff": datetime.utcnow() - timedelta(days=settings.scan_retention_days)},
+            )
+    for policy in POLICIES:
+        if policy.retention_days > 0:
+            await _expire(policy)
+
+
+class PartitionMaintainer:
+    """Pre-creates upcoming partitions and expires old ones on a fixed interval."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Partition maintenance failed: {}", exc)
+            await asyncio.sleep(settings.partition_maintenance_interval)
+
+
+maintainer = PartitionMaintainer()
@@ -7,9 +7,8 @@ from pydantic import BaseModel, Field
 
 
 class Pagination(BaseModel):
-    total: int
     limit: int = 50
-    offset: int = 0
+    next_cursor: Optional[str] = None
 
 
 class AssetBase(BaseModel):
@@ -30,6 +29,22 @@ class AssetRead(AssetBase):
         from_attributes = True
 
 
+class AssetPage(BaseModel):
+    items: list[AssetRead]
+    pagination: Pagination
+
+
+class AssetRisk(BaseModel):
+    asset_id: int
+    ip_address: str
+    score: Optional[float] = None
+    severity: Optional[str] = None
+    alerted_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class ScanBase(BaseModel):
     asset_id: int
     command: str
@@ -51,6 +66,50 @@ class ScanRead(ScanBase):
         from_attributes = True
 
 
+class ScanPage(BaseModel):
+    items: list[ScanRead]
+    pagination: Pagination
+
+
+class PortObservationRead(BaseModel):
+    asset_id: int
+    port: int
+    protocol: str
+    service: str
+    state: str
+    first_seen: datetime
+    last_seen: datetime
+    state_changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PortObservationPage(BaseModel):
+    items: list[PortObservationRead]
+    pagination: Pagination
+
+
+class ScanBulkCreate(BaseModel):
+    command: str
+    raw_output_path: Optional[str] = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    ended_at: Optional[datetime] = None
+    hosts: list[dict[str, Any]] = Field(default_factory=list)
+    # A retry carrying the key of an accepted batch gets that batch's result, not new scans.
+    idempotency_key: Optional[str] = Field(None, max_length=128)
+
+
+class ScanBulkItem(BaseModel):
+    ip_address: str
+    asset_id: int
+    scan_id: int
+
+
+class ScanBulkResult(BaseModel):
+    items: list[ScanBulkItem]
+
+
 class AlertBase(BaseModel):
     asset_id: Optional[int]
     severity: str = "low"
@@ -59,6 +118,7 @@ class AlertBase(BaseModel):
     details: Optional[dict[str, Any]] = None
     explanation: Optional[dict[str, Any]] = None
     status: str = "open"
+    dedup_key: Optional[str] = Field(default=None, max_length=64)
 
 
 class AlertCreate(AlertBase):
@@ -73,6 +133,15 @@ class AlertRead(AlertBase):
         from_attributes = True
 
 
+class AlertPage(BaseModel):
+    items: list[AlertRead]
+    pagination: Pagination
+
+
+class AlertStatusUpdate(BaseModel):
+    status: str = Field(max_length=32)
+
+
 class ActionLogBase(BaseModel):
     alert_id: int
     action_type: str
@@ -100,3 +169,15 @@ class DashboardSummary(BaseModel):
     recent_scans: list[ScanRead]
     latest_alerts: list[AlertRead]
     automated_actions: list[ActionLogRead]
+
+
+class PoolStatus(BaseModel):
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    waiting: int
+    acquisitions: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+
+import httpx
+from loguru import logger
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.getenv("HTTP2", "0").lower() in ("1", "true", "yes")
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "4"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30"))
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# The backend is up but shedding load; the request was not processed.
+RETRY_STATUSES = frozenset({429, 503})
+# A proxy gave up on the backend; it may or may not have handled the request.
+IDEMPOTENT_RETRY_STATUSES = frozenset({502, 504})
+UNAVAILABLE_STATUSES = frozenset({502, 503, 504})
+# Errors after which the request may still have reached the backend.
+_SENT_ERRORS = (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError)
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without contacting the backend while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fail fast after ``failure_threshold`` consecutive backend failures.
+
+    Once open, one trial request is let through every ``reset_timeout`` seconds; the first
+    success closes the breaker again.
+    """
+
+    def __init__(
+        self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        return "closed" if self.opened_at is None else "open"
+
+    def before_request(self, request: httpx.Request) -> None:
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            raise CircuitOpenError("Backend circuit breaker is open", request=request)
+        # Half-open: this request is the trial, everything else keeps failing fast until it
+        # succeeds or the next reset_timeout has passed.
+        self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Backend reachable again, closing circuit breaker")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is None and self.failures >= self.failure_threshold:
+            logger.warning(
+                "Backend failed {} times in a row, opening circuit breaker for {:.0f}s",
+                self.failures,
+                self.reset_timeout,
+            )
+            self.opened_at = time.monotonic()
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Retry backend calls with jittered exponential backoff behind a circuit breaker.
+
+    Connection failures and 429/503 responses are retried for every method, since the
+    backend never saw or never processed the request. Read errors and 502/504 are only
+    retried for idempotent methods.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        breaker: CircuitBreaker,
+        retries: int = HTTP_RETRIES,
+        backoff_base: float = HTTP_BACKOFF_BASE,
+        backoff_max: float = HTTP_BACKOFF_MAX,
+    ) -> None:
+        self.transport = transport
+        self.breaker = breaker
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _retry_after(self, response: httpx.Response, attempt: int) -> float:
+        try:
+            return min(self.backoff_max, float(response.headers["Retry-After"]))
+        except (KeyError, ValueError):
+            return self._backoff(attempt)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # The breaker counts calls, not attempts: a call is one failure once its retries are spent.
+        self.breaker.before_request(request)
+        idempotent = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except (*_CONNECT_ERRORS, *_SENT_ERRORS) as exc:
+                retryable = idempotent or isinstance(exc, _CONNECT_ERRORS)
+                if attempt >= self.retries or not retryable:
+                    self.breaker.record_failure()
+                    raise
+                delay = self._backoff(attempt)
+                reason = repr(exc)
+            else:
+                status = response.status_code
+                retryable = status in RETRY_STATUSES or (
+                    idempotent and status in IDEMPOTENT_RETRY_STATUSES
+                )
+                if attempt >= self.retries or not retryable:
+                    if status in UNAVAILABLE_STATUSES:
+                        self.breaker.record_failure()
+                    elif status < 500:
+                        self.breaker.record_success()
+                    return response
+                await response.aclose()
+                delay = self._retry_after(response, attempt)
+                reason = f"status {status}"
+            attempt += 1
+            logger.warning(
+                "{} {} failed ({}), retry {}/{} in {:.1f}s",
+                request.method,
+                request.url.path,
+                reason,
+                attempt,
+                self.retries,
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def _http2_available() -> bool:
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def create_backend_client(base_url: str, timeout: float = HTTP_TIMEOUT) -> httpx.AsyncClient:
+    """A long-lived client for backend calls: pooled keep-alive connections and retries.
+
+    Services create it once and pass it around, so connections survive between cycles.
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=_http2_available())
+    return httpx.AsyncClient(
+        base_url=base_url, timeout=timeout, transport=RetryTransport(transport, CircuitBreaker())
+    )
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+from loguru import logger
+
+RECONNECT_DELAY = 5.0
+# The backend sends a keepalive comment every 15s, so a silent minute means a dead stream.
+READ_TIMEOUT = 60.0
+
+
+async def follow_events(base_url: str, topics: list[str], wake: asyncio.Event) -> None:
+    """Keep an SSE subscription to the backend open and set ``wake`` for every event.
+
+    The stream resumes from the last seen event id after a reconnect, so bursts that arrive
+    while disconnected still wake the consumer once it is back.
+    """
+    last_event_id: str | None = None
+    timeout = httpx.Timeout(30.0, read=READ_TIMEOUT)
+    while True:
+        headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+        try:
+            async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+                async with client.stream(
+                    "GET",
+                    "/api/v1/events/stream",
+                    params={"topics": ",".join(topics)},
+                    headers=headers,
+                ) as response:
+                    response.raise_for_status()
+                    logger.info("Subscribed to backend events {}", topics)
+                    async for line in response.aiter_lines():
+                        if line.startswith("id:"):
+                            last_event_id = line[3:].strip()
+                        elif line.startswith("data:"):
+                            wake.set()
+        except httpx.HTTPError as exc:
+            logger.warning("Event stream unavailable ({}), falling back to polling", exc)
+        await asyncio.sleep(RECONNECT_DELAY)
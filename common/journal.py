@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+JOURNAL_FLUSH_RECORDS = int(os.getenv("JOURNAL_FLUSH_RECORDS", "256"))
+JOURNAL_FLUSH_MS = float(os.getenv("JOURNAL_FLUSH_MS", "50"))
+JOURNAL_MAX_BYTES = int(os.getenv("JOURNAL_MAX_BYTES", str(64 * 1024 * 1024)))
+JOURNAL_MAX_AGE = float(os.getenv("JOURNAL_MAX_AGE", "86400"))
+JOURNAL_COMPRESSION = os.getenv("JOURNAL_COMPRESSION", "none")  # none | gzip | zstd
+JOURNAL_RETAIN_SEGMENTS = int(os.getenv("JOURNAL_RETAIN_SEGMENTS", "0"))  # 0 keeps all
+
+_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+@dataclass
+class Segment:
+    """A sealed (rotated) journal file, as recorded in the journal's index."""
+
+    name: str
+    inode: int
+    first_ts: str | None
+    last_ts: str | None
+    records: int
+    bytes: int
+    compression: str = "none"
+    # Hash of the first line: inodes are reused once a compressed or expired segment is
+    # unlinked, so readers match on (inode, fingerprint).
+    fingerprint: str | None = None
+
+
+def line_fingerprint(line: bytes) -> str:
+    return hashlib.sha1(line).hexdigest()[:16]
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.index.json")
+
+
+def load_index(path: Path) -> list[Segment]:
+    try:
+        entries = json.loads(index_path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    return [Segment(**entry) for entry in entries]
+
+
+def find_segments(
+    path: Path, since: datetime | None = None, until: datetime | None = None
+) -> list[Segment]:
+    """Sealed segments, oldest first, that may hold records appended in [since, until)."""
+    segments = []
+    for segment in load_index(path):
+        if since is not None and segment.last_ts and segment.last_ts < since.isoformat():
+            continue
+        if until is not None and segment.first_ts and segment.first_ts >= until.isoformat():
+            continue
+        segments.append(segment)
+    return segments
+
+
+def segments_from(
+    path: Path, inode: int, fingerprint: str | None = None, include: bool = True
+) -> list[Segment]:
+    """The segment sealed from a file (if ``include``) and every segment sealed after it."""
+    segments = load_index(path)
+    for position in range(len(segments) - 1, -1, -1):
+        segment = segments[position]
+        if segment.inode == inode and fingerprint in (None, segment.fingerprint):
+            return segments[position if include else position + 1 :]
+    return []
+
+
+def open_segment(path: Path, segment: Segment) -> BinaryIO:
+    """Open a sealed segment for reading; compressed segments are decompressed on the fly."""
+    segment_path = path.with_name(segment.name)
+    if segment.compression == "gzip":
+        return gzip.open(segment_path, "rb")  # type: ignore[return-value]
+    if segment.compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed; cannot read " + segment.name)
+        reader = zstandard.ZstdDecompressor().stream_reader(segment_path.open("rb"), closefd=True)
+        return io.BufferedReader(reader)  # type: ignore[arg-type]
+    return segment_path.open("rb")
+
+
+def _write_index(path: Path, segments: list[Segment]) -> None:
+    target = index_path(path)
+    tmp_path = target.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps([asdict(segment) for segment in segments]), encoding="utf-8")
+    tmp_path.replace(target)
+
+
+def _compress(source: Path, compression: str) -> Path:
+    target = source.with_name(source.name + _SUFFIXES[compression])
+    with source.open("rb") as raw, target.open("wb") as out:
+        if compression == "zstd":
+            zstandard.ZstdCompressor().copy_stream(raw, out)
+        else:
+            with gzip.GzipFile(fileobj=out, mode="wb") as packed:
+                while chunk := raw.read(1 << 20):
+                    packed.write(chunk)
+        out.flush()
+        os.fsync(out.fileno())
+    source.unlink()
+    return target
+
+
+class JournalWriter:
+    """Append-only JSONL journal with group commit and size/age based rotation.
+
+    ``append`` only buffers. The buffer is written with a single write + fsync once it holds
+    ``flush_records`` records or ``flush_ms`` after the first unflushed append, whichever
+    comes first; ``flush`` forces that and waits for it. The live file keeps its name, so
+    tailing readers see a rename when it is sealed; sealed segments are listed in
+    ``<stem>.index.json`` with their original inode and time range.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        flush_records: int = JOURNAL_FLUSH_RECORDS,
+        flush_ms: float = JOURNAL_FLUSH_MS,
+        max_bytes: int = JOURNAL_MAX_BYTES,
+        max_age: float = JOURNAL_MAX_AGE,
+        compression: str = JOURNAL_COMPRESSION,
+        retain_segments: int = JOURNAL_RETAIN_SEGMENTS,
+    ) -> None:
+        if compression not in _SUFFIXES:
+            raise ValueError(f"unknown journal compression {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; compressing {} with gzip", path.name)
+            compression = "gzip"
+        self.path = path
+        self.flush_records = flush_records
+        self.flush_ms = flush_ms
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+        self.retain_segments = retain_segments
+
+        self._buffer: list[tuple[str, bytes]] = []
+        # Append-time range of the records committed to the live file; None when unknown.
+        self._first_ts: str | None = None
+        self._last_ts: str | None = None
+        self._resumed = False
+        self._fingerprint: str | None = None
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._file: BinaryIO | None = None
+        self._size = 0
+        self._records = 0
+        self._opened_at = 0.0
+
+    def append(self, record: dict[str, Any]) -> None:
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        self._buffer.append((datetime.utcnow().isoformat(), line))
+        if len(self._buffer) >= self.flush_records:
+            self._schedule_commit()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.flush_ms / 1000, self._schedule_commit)
+
+    async def flush(self) -> None:
+        """Commit everything appended so far; raises if it could not be made durable."""
+        await self._commit(raise_errors=True)
+
+    async def close(self) -> None:
+        await self._commit()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _schedule_commit(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self._commit())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _commit(self, raise_errors: bool = False) -> None:
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._write, b"".join(line for _, line in batch))
+            except OSError as exc:
+                # Keep the records in order for the next attempt rather than dropping them.
+                self._buffer = batch + self._buffer
+                logger.error("Journal write to {} failed: {}", self.path, exc)
+                if raise_errors:
+                    raise
+                return
+            if not self._records and not self._resumed:
+                self._first_ts = batch[0][0]
+                self._fingerprint = line_fingerprint(batch[0][1])
+            self._last_ts = batch[-1][0]
+            self._records += len(batch)
+            if self._size >= self.max_bytes or (
+                datetime.utcnow().timestamp() - self._opened_at >= self.max_age
+            ):
+                try:
+                    await self._seal()
+                except OSError as exc:
+                    logger.error("Sealing journal {} failed: {}", self.path, exc)
+
+    def _open(self) -> BinaryIO:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("ab")
+            stat = os.fstat(self._file.fileno())
+            self._size = stat.st_size
+            self._resumed = stat.st_size > 0
+            if self._resumed:
+                with self.path.open("rb") as existing:
+                    self._fingerprint = line_fingerprint(existing.readline())
+                    existing.seek(0)
+                    chunks = iter(lambda: existing.read(1 << 20), b"")
+                    self._records = sum(chunk.count(b"\n") for chunk in chunks)
+            # After a restart the segment's age is only known from the file itself.
+            self._opened_at = stat.st_mtime if stat.st_size else datetime.utcnow().timestamp()
+        return self._file
+
+    def _write(self, data: bytes) -> None:
+        handle = self._open()
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+        self._size += len(data)
+
+    async def _seal(self) -> None:
+        assert self._file is not None
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        sealed_path = self.path.with_name(f"{self.path.stem}-{stamp}{self.path.suffix}")
+        segment = Segment(
+            name=sealed_path.name,
+            inode=os.fstat(self._file.fileno()).st_ino,
+            first_ts=self._first_ts,
+            last_ts=self._last_ts,
+            records=self._records,
+            bytes=self._size,
+            fingerprint=self._fingerprint,
+        )
+        self._file.close()
+        self._file = None
+        await asyncio.to_thread(self.path.replace, sealed_path)
+        self._first_ts = self._last_ts = None
+        self._records = 0
+        self._resumed = False
+        self._fingerprint = None
+
+        segments = load_index(self.path) + [segment]
+        expired = []
+        if self.retain_segments > 0 and len(segments) > self.retain_segments:
+            expired, segments = segments[: -self.retain_segments], segments[-self.retain_segments :]
+        await asyncio.to_thread(_write_index, self.path, segments)
+        for old in expired:
+            self.path.with_name(old.name).unlink(missing_ok=True)
+        logger.info("Sealed journal segment {} ({} bytes)", sealed_path.name, segment.bytes)
+
+        if self.compression != "none":
+            compressed = await asyncio.to_thread(_compress, sealed_path, self.compression)
+            segment.name, segment.compression = compressed.name, self.compression
+            await asyncio.to_thread(_write_index, self.path, segments)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from common.journal import (
+    JournalWriter,
+    line_fingerprint,
+    load_index,
+    open_segment,
+    segments_from,
+)
+
+
+def _writer(path: Path, **options) -> JournalWriter:
+    # Timer-driven commits are exercised separately; everything else flushes explicitly.
+    options = {"flush_records": 1000, "flush_ms": 60_000, "max_age": 86_400, **options}
+    return JournalWriter(path, **options)
+
+
+def _records(path: Path) -> list[dict]:
+    lines = []
+    for segment in load_index(path):
+        with open_segment(path, segment) as handle:
+            lines.extend(handle.read().splitlines())
+    if path.exists():
+        lines.extend(path.read_bytes().splitlines())
+    return [json.loads(line) for line in lines]
+
+
+def test_appends_are_buffered_until_flush(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.jsonl"
+
+    async def run() -> None:
+        writer = _writer(path)
+        writer.append({"n": 1})
+        writer.append({"n": 2})
+        assert not path.exists() or path.read_bytes() == b""
+        await writer.flush()
+        assert [json.loads(line) for line in path.read_bytes().splitlines()] == [{"n": 1}, {"n": 2}]
+        await writer.close()
+
+    asyncio.run(run())
+
+
+def test_group_commit_after_flush_records_or_flush_ms(tmp_path: Path) -> None:
+    by_count = tmp_path / "count.jsonl"
+    by_time = tmp_path / "time.jsonl"
+
+    async def run() -> None:
+        counted = _writer(by_count, flush_records=3)
+        timed = _writer(by_time, flush_ms=10)
+        for n in range(3):
+            counted.append({"n": n})
+        timed.append({"n": 0})
+        await asyncio.sleep(0.1)
+        assert len(by_count.read_bytes().splitlines()) == 3
+        assert len(by_time.read_bytes().splitlines()) == 1
+        await counted.close()
+        await timed.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_rotation_seals_segments_into_the_index(tmp_path: Path, compression: str) -> None:
+    path = tmp_path / "alerts.jsonl"
+
+    async def run() -> None:
+        writer = _writer(path, max_bytes=200, compression=compression)
+        for n in range(40):
+            writer.append({"n": n, "pad": "x" * 20})
+            if n % 5 == 4:
+                await writer.flush()
+        await writer.close()
+
+    asyncio.run(run())
+    segments = load_index(path)
+    assert len(segments) > 1
+    assert all(segment.compression == compression for segment in segments)
+    suffix = ".gz" if compression == "gzip" else ""
+    assert all(segment.name.endswith(".jsonl" + suffix) for segment in segments)
+    assert all((tmp_path / segment.name).exists() for segment in segments)
+    assert [record["n"] for record in _records(path)] == list(range(40))
+    for segment in segments:
+        with open_segment(path, segment) as handle:
+            lines = handle.read().splitlines()
+        assert segment.records == len(lines)
+        assert segment.fingerprint == line_fingerprint(lines[0] + b"\n")
+        assert segment.first_ts is not None and segment.first_ts <= segment.last_ts
+
+
+def test_retain_segments_drops_the_oldest(tmp_path: Path) -> None:
+    path = tmp_path / "audit.jsonl"
+
+    async def run() -> None:
+        writer = _writer(path, max_bytes=1, retain_segments=2)
+        for n in range(5):
+            writer.append({"n": n})
+            await writer.flush()
+        await writer.close()
+
+    asyncio.run(run())
+    segments = load_index(path)
+    assert len(segments) == 2
+    assert sorted(p.name for p in tmp_path.glob("audit-*.jsonl")) == sorted(s.name for s in segments)
+    assert [record["n"] for record in _records(path)] == [3, 4]
+
+
+def test_resumed_file_is_sealed_with_its_original_first_line(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.jsonl"
+
+    async def run() -> None:
+        first = _writer(path)
+        first.append({"n": 0})
+        first.append({"n": 1})
+        await first.close()
+        # A restarted service keeps appending to the same live file.
+        second = _writer(path, max_bytes=1)
+        second.append({"n": 2})
+        await second.flush()
+        await second.close()
+
+    asyncio.run(run())
+    [segment] = load_index(path)
+    assert segment.records == 3
+    assert segment.fingerprint == line_fingerprint(json.dumps({"n": 0}).encode() + b"\n")
+    assert not path.exists()
+
+
+def test_segments_from_matches_inode_and_fingerprint(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.jsonl"
+
+    async def run() -> None:
+        writer = _writer(path, max_bytes=1)
+        for n in range(3):
+            writer.append({"n": n})
+            await writer.flush()
+        await writer.close()
+
+    asyncio.run(run())
+    segments = load_index(path)
+    middle = segments[1]
+    assert segments_from(path, middle.inode, middle.fingerprint) == segments[1:]
+    assert segments_from(path, middle.inode, middle.fingerprint, include=False) == segments[2:]
+    # Uncompressed segments keep their inodes, so a wrong fingerprint matches nothing.
+    assert segments_from(path, middle.inode, "0" * 16) == []
+    assert segments_from(path, -1) == []
+
+
+def test_unknown_compression_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        JournalWriter(tmp_path / "alerts.jsonl", compression="lz4")
@@ -1,8 +1,33 @@
 import { useEffect, useState } from "react";
 import axios from "axios";
-import type { DashboardSummary } from "../types/dashboard";
+import type { Alert, AutomatedAction, DashboardSummary, Scan } from "../types/dashboard";
 
 const API_BASE_URL = (import.meta.env.VITE_API_BASE_URL as string) || __API_BASE_URL__;
+const LIST_SIZE = 5;
+const POLL_INTERVAL_MS = 10000;
+
+function prepend<T extends { id: number }>(items: T[], item: T): T[] {
+  return [item, ...items.filter((existing) => existing.id !== item.id)].slice(0, LIST_SIZE);
+}
+
+function applyAlert(data: DashboardSummary, alert: Alert): DashboardSummary {
+  return {
+    ...data,
+    vulnerabilities_detected: data.vulnerabilities_detected + 1,
+    high_count: data.high_count + (alert.severity === "high" ? 1 : 0),
+    medium_count: data.medium_count + (alert.severity === "medium" ? 1 : 0),
+    low_count: data.low_count + (alert.severity === "low" ? 1 : 0),
+    latest_alerts: prepend(data.latest_alerts, alert),
+  };
+}
+
+function applyScan(data: DashboardSummary, scan: Scan): DashboardSummary {
+  return { ...data, recent_scans: prepend(data.recent_scans, scan) };
+}
+
+function applyAction(data: DashboardSummary, action: AutomatedAction): DashboardSummary {
+  return { ...data, automated_actions: prepend(data.automated_actions, action) };
+}
 
 export function useDashboardData() {
   const [data, setData] = useState<DashboardSummary | null>(null);
@@ -31,12 +56,48 @@ export function useDashboardData() {
       }
     }
 
-    fetchData();
-    const interval = setInterval(fetchData, 10000);
+    if (typeof EventSource === "undefined") {
+      fetchData();
+      const interval = setInterval(fetchData, POLL_INTERVAL_MS);
+      return () => {
+        isMounted = false;
+        clearInterval(interval);
+      };
+    }
+
+    // The stream opens with a full snapshot and then only sends deltas. EventSource
+    // reconnects on its own, and every reconnect starts again from a fresh snapshot.
+    const source = new EventSource(`${API_BASE_URL}/api/v1/dashboard/stream`);
+    let receivedSnapshot = false;
+    source.addEventListener("snapshot", (event) => {
+      receivedSnapshot = true;
+      setData(JSON.parse((event as MessageEvent).data) as DashboardSummary);
+      setError(null);
+      setLoading(false);
+    });
+    source.addEventListener("alert.created", (event) => {
+      const alert = JSON.parse((event as MessageEvent).data) as Alert;
+      setData((current) => (current ? applyAlert(current, alert) : current));
+    });
+    source.addEventListener("scan.created", (event) => {
+      const scan = JSON.parse((event as MessageEvent).data) as Scan;
+      setData((current) => (current ? applyScan(current, scan) : current));
+    });
+    source.addEventListener("action.created", (event) => {
+      const action = JSON.parse((event as MessageEvent).data) as AutomatedAction;
+      setData((current) => (current ? applyAction(current, action) : current));
+    });
+    source.onerror = () => {
+      // Keep showing the last known data while EventSource retries in the background.
+      if (!receivedSnapshot) {
+        setError("Unable to load dashboard data");
+        setLoading(false);
+      }
+    };
 
     return () => {
       isMounted = false;
-      clearInterval(interval);
+      source.close();
     };
   }, []);
 
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+from loguru import logger
+
+ActionHandler = Callable[[dict[str, Any], str], Awaitable[dict[str, Any] | None]]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ActionExecutor:
+    """Runs response actions on per-action worker pools with per-action rate limits."""
+
+    def __init__(
+        self,
+        handler: ActionHandler,
+        concurrency: dict[str, int],
+        rate_limits: dict[str, float],
+        queue_size: int = 1000,
+    ) -> None:
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queues = {action: asyncio.Queue(maxsize=queue_size) for action in concurrency}
+        self.buckets = {
+            action: TokenBucket(rate_limits.get(action, 0), int(rate_limits.get(action, 0)) or 1)
+            for action in concurrency
+        }
+        self.completed: set[int] = set()
+        self.failed: list[dict[str, Any]] = []
+        self.action_logs: list[dict[str, Any]] = []
+        self._workers: list[asyncio.Task[None]] = []
+        self._flush_lock = asyncio.Lock()
+
+    def start(self) -> None:
+        for action, workers in self.concurrency.items():
+            for _ in range(max(workers, 1)):
+                self._workers.append(asyncio.create_task(self._work(action)))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def submit(self, alert: dict[str, Any], action: str) -> None:
+        queue = self.queues.get(action) or self.queues["audit_only"]
+        await queue.put((alert, action))
+
+    async def join(self) -> None:
+        await asyncio.gather(*(queue.join() for queue in self.queues.values()))
+
+    async def _work(self, action: str) -> None:
+        queue = self.queues[action]
+        while True:
+            alert, requested_action = await queue.get()
+            try:
+                await self.buckets[action].acquire()
+                action_log = await self.handler(alert, requested_action)
+                if action_log is not None:
+                    self.action_logs.append(action_log)
+                self.completed.add(alert["id"])
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Action {} failed for alert {}: {}", requested_action, alert.get("id"), exc)
+                self.failed.append(alert)
+            finally:
+                queue.task_done()
+
+    async def flush_action_logs(self, client: httpx.AsyncClient, batch_size: int) -> None:
+        async with self._flush_lock:
+            while self.action_logs:
+                batch = self.action_logs[:batch_size]
+                response = await client.post("/api/v1/actions:bulk", json=batch)
+                response.raise_for_status()
+                del self.action_logs[: len(batch)]
+
+    async def flush_periodically(
+        self, client: httpx.AsyncClient, batch_size: int, interval: float
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_action_logs(client, batch_size)
+            except httpx.HTTPError as exc:
+                logger.warning("Deferring action log submission: {}", exc)
@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -10,11 +11,25 @@ from typing import Any
 import httpx
 from loguru import logger
 
+from common.client import create_backend_client
+from common.events import follow_events
+from common.journal import JournalWriter
+
+from .executor import ActionExecutor
+from .state import ProcessedIds, write_atomic
+from .tail import AlertTail, ChangeWatcher
+
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://backend:8000")
 POLICY_PATH = Path(os.getenv("RESPONSE_POLICY", "/app/policy.json"))
 ALERTS_FILE = Path(os.getenv("ALERTS_FILE", "/data/alerts/alerts.jsonl"))
 AUDIT_DIR = Path(os.getenv("AUDIT_DIR", "/data/audit"))
 STATE_PATH = Path(os.getenv("RESPONDER_STATE", "/app/.responder_state.json"))
+POLL_INTERVAL = float(os.getenv("RESPONDER_POLL_INTERVAL", "1"))
+ID_WINDOW = int(os.getenv("RESPONDER_ID_WINDOW", "4096"))
+QUEUE_SIZE = int(os.getenv("RESPONDER_QUEUE_SIZE", "1000"))
+ACTION_BATCH_SIZE = int(os.getenv("RESPONDER_ACTION_BATCH_SIZE", "200"))
+ACTION_FLUSH_INTERVAL = float(os.getenv("RESPONDER_ACTION_FLUSH_INTERVAL", "1"))
+MAX_ATTEMPTS = int(os.getenv("RESPONDER_MAX_ATTEMPTS", "5"))
 
 DEFAULT_POLICY = {
     "thresholds": {
@@ -24,8 +39,15 @@ DEFAULT_POLICY = {
         "low": "audit_only",
     },
     "email_recipients": ["soc-ops@example.local"],
+    "concurrency": {"block_ip": 4, "email_only": 2, "audit_only": 8},
+    # Actions per second per action type; 0 disables the limit.
+    "rate_limits": {"block_ip": 50, "email_only": 5, "audit_only": 0},
 }
 
+response_journal = JournalWriter(AUDIT_DIR / "response.jsonl")
+# Alerts whose action still failed after MAX_ATTEMPTS, kept for manual follow-up.
+dead_letter_journal = JournalWriter(AUDIT_DIR / "response_dead_letter.jsonl")
+
 
 def load_policy() -> dict[str, Any]:
     if not POLICY_PATH.exists():
@@ -37,8 +59,7 @@ def ensure_audit_dir() -> None:
     AUDIT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-async def apply_action(client: httpx.AsyncClient, alert: dict[str, Any], action: str) -> None:
-    audit_path = AUDIT_DIR / "response.jsonl"
+async def apply_action(alert: dict[str, Any], action: str) -> dict[str, Any] | None:
     details = {
         "action": action,
         "alert_id": alert.get("id"),
@@ -54,66 +75,144 @@ async def apply_action(client: httpx.AsyncClient, alert: dict[str, Any], action:
     else:
         details["status"] = "logged"
 
-    with audit_path.open("a", encoding="utf-8") as audit_file:
-        audit_file.write(json.dumps(details) + "\n")
-
-    if alert.get("id"):
-        await client.post(
-            "/api/v1/actions",
-            json={
-                "alert_id": alert["id"],
-                "action_type": details["status"],
-                "details": details,
-            },
-        )
+    response_journal.append(details)
 
+    if not alert.get("id"):
+        return None
+    return {"alert_id": alert["id"], "action_type": details["status"], "details": details}
 
-def load_state() -> set[int]:
+
+def build_executor(policy: dict[str, Any]) -> ActionExecutor:
+    return ActionExecutor(
+        apply_action,
+        concurrency={**DEFAULT_POLICY["concurrency"], **policy.get("concurrency", {})},
+        rate_limits={**DEFAULT_POLICY["rate_limits"], **policy.get("rate_limits", {})},
+        queue_size=QUEUE_SIZE,
+    )
+
+
+def load_state() -> tuple[ProcessedIds, AlertTail, deque[str]]:
     if not STATE_PATH.exists():
-        return set()
+        return ProcessedIds(ID_WINDOW), AlertTail(ALERTS_FILE), deque()
     try:
         data = json.loads(STATE_PATH.read_text(encoding="utf-8"))
-        return set(data.get("processed_ids", []))
     except json.JSONDecodeError:
-        return set()
-
-
-def save_state(processed_ids: set[int]) -> None:
-    STATE_PATH.write_text(json.dumps({"processed_ids": sorted(processed_ids)}), encoding="utf-8")
-
-
-async def process_alerts(policy: dict[str, Any], processed_ids: set[int]) -> set[int]:
+        return ProcessedIds(ID_WINDOW), AlertTail(ALERTS_FILE), deque()
+    tail = AlertTail(
+        ALERTS_FILE,
+        inode=data.get("inode"),
+        offset=data.get("offset", 0),
+        fingerprint=data.get("fingerprint"),
+    )
+    return ProcessedIds.from_dict(data, ID_WINDOW), tail, deque(data.get("pending", []))
+
+
+def save_state(processed_ids: ProcessedIds, tail: AlertTail, pending: deque[str]) -> None:
+    # Alerts waiting for a retry were already read past, so they are saved with the offset.
+    write_atomic(
+        STATE_PATH,
+        {
+            **processed_ids.to_dict(),
+            "inode": tail.inode,
+            "offset": tail.offset,
+            "fingerprint": tail.fingerprint,
+            "pending": list(pending),
+        },
+    )
+
+
+async def process_alerts(
+    client: httpx.AsyncClient,
+    policy: dict[str, Any],
+    processed_ids: ProcessedIds,
+    tail: AlertTail,
+    pending: deque[str],
+    executor: ActionExecutor,
+) -> ProcessedIds:
+    pending.extend(tail.read_lines())
+    if not pending and not executor.action_logs:
+        return processed_ids
     ensure_audit_dir()
-    async with httpx.AsyncClient(base_url=BACKEND_BASE_URL, timeout=30) as client:
-        if not ALERTS_FILE.exists():
-            return processed_ids
-        for line in ALERTS_FILE.read_text(encoding="utf-8").splitlines():
+    flusher = asyncio.create_task(
+        executor.flush_periodically(client, ACTION_BATCH_SIZE, ACTION_FLUSH_INTERVAL)
+    )
+    try:
+        submitted: set[int] = set()
+        while pending:
             try:
-                alert = json.loads(line)
+                alert = json.loads(pending.popleft())
             except json.JSONDecodeError:
                 continue
             alert_id = alert.get("id")
-            if alert_id is None or alert_id in processed_ids:
+            if alert_id is None or alert_id in processed_ids or alert_id in submitted:
                 continue
+            submitted.add(alert_id)
             severity = alert.get("severity", "low")
             action = policy.get("thresholds", {}).get(severity, "audit_only")
-            await apply_action(client, alert, action)
-            processed_ids.add(alert_id)
+            # Bounded queues apply backpressure here when an action pool falls behind.
+            await executor.submit(alert, action)
+        await executor.join()
+    finally:
+        flusher.cancel()
+
+    for alert_id in sorted(executor.completed):
+        processed_ids.add(alert_id)
+    executor.completed.clear()
+    # Failed alerts go back to the queue for the next cycle, up to MAX_ATTEMPTS; after that
+    # they are parked in the dead-letter journal and count as handled.
+    for alert in executor.failed:
+        attempts = processed_ids.fail(alert["id"])
+        if attempts < MAX_ATTEMPTS:
+            pending.append(json.dumps(alert))
+            continue
+        logger.error("Giving up on alert {} after {} failed attempts", alert["id"], attempts)
+        dead_letter_journal.append(
+            {"alert": alert, "attempts": attempts, "timestamp": datetime.utcnow().isoformat()}
+        )
+        processed_ids.add(alert["id"])
+    executor.failed.clear()
+    await executor.flush_action_logs(client, ACTION_BATCH_SIZE)
+    await response_journal.flush()
+    await dead_letter_journal.flush()
+    # Everything read is now either handled or in the saved retry queue.
+    save_state(processed_ids, tail, pending)
     return processed_ids
 
 
 async def responder_loop() -> None:
     policy = load_policy()
-    processed_ids = load_state()
-    while True:
-        try:
-            processed_ids = await process_alerts(policy, processed_ids)
-            save_state(processed_ids)
-        except httpx.HTTPError as exc:
-            logger.error("Responder HTTP error: %s", exc)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("Unexpected responder error: %s", exc)
-        await asyncio.sleep(int(os.getenv("RESPONDER_INTERVAL", "120")))
+    processed_ids, tail, pending = load_state()
+    executor = build_executor(policy)
+    executor.start()
+    watcher = ChangeWatcher(ALERTS_FILE.parent)
+    wake = asyncio.Event()
+    subscription = asyncio.create_task(follow_events(BACKEND_BASE_URL, ["alert.created"], wake))
+    client = create_backend_client(BACKEND_BASE_URL)
+    try:
+        while True:
+            wake.clear()
+            try:
+                processed_ids = await process_alerts(
+                    client, policy, processed_ids, tail, pending, executor
+                )
+            except httpx.HTTPError as exc:
+                logger.error("Responder HTTP error: %s", exc)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Unexpected responder error: %s", exc)
+            # Wake on alert.created events or file changes, whichever comes first.
+            waiters = [
+                asyncio.create_task(wake.wait()),
+                asyncio.create_task(watcher.wait(POLL_INTERVAL)),
+            ]
+            _, unfinished = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in unfinished:
+                waiter.cancel()
+    finally:
+        subscription.cancel()
+        await executor.stop()
+        await client.aclose()
+        await response_journal.close()
+        await dead_letter_journal.close()
 
 
 def main() -> None:
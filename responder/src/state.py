@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+class ProcessedIds:
+    """Processed alert ids as a high-water mark plus a fixed-size bitmap below it.
+
+    Bit ``k`` of ``bitmap`` records whether ``hwm - k`` was processed. Ids more than ``window``
+    below the mark are treated as processed, so memory and state size stay constant. Ids in
+    ``retrying`` (failed, with their failure count) are the exception: they are never reported
+    as processed until they succeed or are given up on, however far the mark moves.
+    """
+
+    def __init__(
+        self, window: int, hwm: int = 0, bitmap: int = 0, retrying: dict[int, int] | None = None
+    ) -> None:
+        self.window = window
+        self.hwm = hwm
+        self.bitmap = bitmap & ((1 << window) - 1)
+        self.retrying = retrying or {}
+
+    def __contains__(self, alert_id: int) -> bool:
+        if alert_id in self.retrying:
+            return False
+        if alert_id > self.hwm:
+            return False
+        if alert_id <= self.hwm - self.window:
+            return True
+        return bool(self.bitmap >> (self.hwm - alert_id) & 1)
+
+    def fail(self, alert_id: int) -> int:
+        """Record a failed attempt; returns how many attempts have failed so far."""
+        self.retrying[alert_id] = self.retrying.get(alert_id, 0) + 1
+        return self.retrying[alert_id]
+
+    def add(self, alert_id: int) -> None:
+        self.retrying.pop(alert_id, None)
+        if alert_id > self.hwm:
+            self.bitmap = (self.bitmap << (alert_id - self.hwm)) & ((1 << self.window) - 1)
+            self.hwm = alert_id
+        if alert_id > self.hwm - self.window:
+            self.bitmap |= 1 << (self.hwm - alert_id)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "hwm": self.hwm,
+            "window": self.window,
+            "bitmap": format(self.bitmap, "x"),
+            "retrying": {str(alert_id): count for alert_id, count in self.retrying.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], window: int) -> ProcessedIds:
+        if "processed_ids" in data:
+            # Legacy state: a full list of every processed id.
+            processed = cls(window)
+            for alert_id in sorted(data["processed_ids"]):
+                processed.add(alert_id)
+            return processed
+        retrying = {int(alert_id): count for alert_id, count in data.get("retrying", {}).items()}
+        processed = cls(
+            data.get("window", window), data.get("hwm", 0), int(data.get("bitmap", "0"), 16), retrying
+        )
+        if processed.window != window:
+            resized = cls(window, processed.hwm, retrying=retrying)
+            for alert_id in range(max(processed.hwm - window + 1, 1), processed.hwm + 1):
+                if alert_id in processed:
+                    resized.add(alert_id)
+            return resized
+        return processed
+
+
+def write_atomic(path: Path, payload: dict[str, Any]) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as tmp_file:
+        json.dump(payload, tmp_file)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+from loguru import logger
+
+from common.journal import Segment, line_fingerprint, load_index, open_segment, segments_from
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # non-Linux hosts fall back to polling
+    INotify = None
+
+
+class AlertTail:
+    """Follow a JSONL file by byte offset, surviving rotation and truncation.
+
+    When the file is a journal (see common.journal), segments sealed while we were not
+    reading are found through the journal index by their original inode and drained first.
+    Files are identified by inode plus a hash of their first line, since an inode freed by
+    compressing a sealed segment may be handed straight to the next live file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        inode: int | None = None,
+        offset: int = 0,
+        fingerprint: str | None = None,
+    ) -> None:
+        self.path = path
+        self.inode = inode
+        self.offset = offset
+        self.fingerprint = fingerprint
+        self._file: BinaryIO | None = None
+        self._sealed = False
+        # True once the file identified by ``inode`` has been read to its end and rotated away.
+        self._finished = False
+        self._backlog: list[Segment] = []
+
+    def _open_sealed(self) -> bool:
+        while self._backlog:
+            segment = self._backlog.pop(0)
+            try:
+                handle = open_segment(self.path, segment)
+            except FileNotFoundError:
+                logger.warning("Journal segment {} expired before it was read", segment.name)
+                continue
+            if segment.inode != self.inode or self.fingerprint not in (None, segment.fingerprint):
+                self.inode, self.offset = segment.inode, 0
+            self.fingerprint = segment.fingerprint
+            handle.seek(self.offset)
+            self._file, self._sealed, self._finished = handle, True, False
+            return True
+        return False
+
+    def _open(self) -> bool:
+        if self._open_sealed():
+            return True
+        try:
+            handle: BinaryIO | None = self.path.open("rb")
+        except FileNotFoundError:
+            handle = None
+        inode = os.fstat(handle.fileno()).st_ino if handle is not None else None
+        fingerprint = self._first_line(handle) if handle is not None else None
+        same = handle is not None and inode == self.inode and self.fingerprint in (None, fingerprint)
+        if not same:
+            # What we were reading has been rotated: continue with the segments sealed from
+            # it (or after it, once it is finished) before moving on to the live file. A
+            # reader without a position starts at the oldest segment still retained.
+            if self.inode is None:
+                self._backlog = load_index(self.path)
+            else:
+                self._backlog = segments_from(
+                    self.path, self.inode, self.fingerprint, include=not self._finished
+                )
+            if self._open_sealed():
+                if handle is not None:
+                    handle.close()
+                return True
+        if handle is None:
+            return False
+        if not same:
+            self.inode, self.offset, self._finished = inode, 0, False
+        self.fingerprint = fingerprint
+        handle.seek(self.offset)
+        self._file, self._sealed = handle, False
+        return True
+
+    @staticmethod
+    def _first_line(handle: BinaryIO) -> str | None:
+        raw = handle.readline()
+        return line_fingerprint(raw) if raw.endswith(b"\n") else None
+
+    def _drain(self) -> list[str]:
+        assert self._file is not None
+        if not self._sealed and os.fstat(self._file.fileno()).st_size < self.offset:
+            logger.warning("{} was truncated, reading from the start", self.path)
+            self.offset, self.fingerprint = 0, None
+            self._file.seek(0)
+        lines: list[str] = []
+        for raw in iter(self._file.readline, b""):
+            if not raw.endswith(b"\n"):
+                # Partial line still being written; pick it up on the next read.
+                self._file.seek(self.offset)
+                break
+            if self.offset == 0:
+                self.fingerprint = line_fingerprint(raw)
+            self.offset += len(raw)
+            lines.append(raw.decode("utf-8", errors="replace"))
+        return lines
+
+    def _rotated(self) -> bool:
+        if self._sealed:
+            return True
+        try:
+            return self.path.stat().st_ino != self.inode
+        except FileNotFoundError:
+            # Renamed away and not recreated yet: keep reading the old handle unless later
+            # journal segments were already sealed after it.
+            return bool(segments_from(self.path, self.inode, self.fingerprint, include=False))
+
+    def read_lines(self) -> list[str]:
+        if self._file is None and not self._open():
+            return []
+        lines: list[str] = []
+        while True:
+            lines.extend(self._drain())
+            if not self._rotated():
+                return lines
+            # The old file is fully drained through its still-open handle; move on.
+            assert self._file is not None
+            self._file.close()
+            self._file = None
+            self._finished = True
+            if not self._open():
+                return lines
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ChangeWatcher:
+    """Wake up on writes to a directory via inotify, or after ``timeout`` when polling."""
+
+    def __init__(self, directory: Path) -> None:
+        self._inotify = None
+        if INotify is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._inotify = INotify()
+            self._inotify.add_watch(
+                str(directory), flags.MODIFY | flags.CREATE | flags.MOVED_TO | flags.CLOSE_WRITE
+            )
+        logger.info("Watching {} with {}", directory, "inotify" if self._inotify else "polling")
+
+    async def wait(self, timeout: float) -> None:
+        if self._inotify is None:
+            await asyncio.sleep(timeout)
+            return
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        loop.add_reader(self._inotify.fileno(), changed.set)
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(self._inotify.fileno())
+        self._inotify.read(timeout=0)
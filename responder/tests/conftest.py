@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# The service runs as ``python -m src.responder`` from responder/, with ``common`` from the
+# repository root next to it (see responder/Dockerfile).
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+for path in (SERVICE_ROOT, SERVICE_ROOT.parent):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
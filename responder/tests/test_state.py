@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+from src.state import ProcessedIds, write_atomic
+
+
+def test_tracks_ids_inside_the_window() -> None:
+    processed = ProcessedIds(8)
+    for alert_id in (3, 5, 10):
+        processed.add(alert_id)
+    assert [alert_id for alert_id in range(1, 12) if alert_id in processed] == [1, 2, 3, 5, 10]
+    assert processed.hwm == 10
+
+
+def test_ids_below_the_window_count_as_processed() -> None:
+    processed = ProcessedIds(4)
+    processed.add(100)
+    assert 96 in processed
+    assert 97 not in processed
+    assert 101 not in processed
+
+
+def test_matches_a_plain_set_within_the_window() -> None:
+    rng = random.Random(3)
+    window = 64
+    processed = ProcessedIds(window)
+    reference: set[int] = set()
+    for _ in range(2000):
+        alert_id = rng.randint(1, 3000)
+        processed.add(alert_id)
+        reference.add(alert_id)
+        low = max(processed.hwm - window + 1, 1)
+        for probe in range(low, processed.hwm + 2):
+            assert (probe in processed) == (probe in reference)
+
+
+def test_retrying_ids_are_never_reported_as_processed() -> None:
+    processed = ProcessedIds(8)
+    processed.add(1)
+    assert processed.fail(2) == 1
+    assert processed.fail(2) == 2
+    for alert_id in range(3, 100):
+        processed.add(alert_id)
+    # Far below the window, but still waiting for a retry.
+    assert 2 not in processed
+    assert 1 in processed
+    processed.add(2)
+    assert 2 in processed
+    assert processed.retrying == {}
+
+
+def test_round_trips_through_json() -> None:
+    processed = ProcessedIds(16)
+    for alert_id in (1, 4, 9, 30):
+        processed.add(alert_id)
+    processed.fail(7)
+    restored = ProcessedIds.from_dict(json.loads(json.dumps(processed.to_dict())), 16)
+    assert [i for i in range(40) if i in restored] == [i for i in range(40) if i in processed]
+    assert restored.retrying == {7: 1}
+
+
+def test_resizing_the_window_keeps_recent_ids() -> None:
+    processed = ProcessedIds(16)
+    for alert_id in (20, 25, 30):
+        processed.add(alert_id)
+    processed.fail(22)
+    resized = ProcessedIds.from_dict(processed.to_dict(), 8)
+    assert resized.window == 8
+    assert [i for i in range(23, 32) if i in resized] == [25, 30]
+    assert 22 not in resized
+    assert resized.retrying == {22: 1}
+
+
+def test_legacy_id_list_is_migrated() -> None:
+    processed = ProcessedIds.from_dict({"processed_ids": [5, 2, 9]}, 16)
+    assert [i for i in range(1, 12) if i in processed] == [2, 5, 9]
+
+
+def test_write_atomic_replaces_the_file(tmp_path: Path) -> None:
+    path = tmp_path / "state.json"
+    write_atomic(path, {"hwm": 1})
+    write_atomic(path, {"hwm": 2})
+    assert json.loads(path.read_text()) == {"hwm": 2}
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from common.journal import JournalWriter
+from src.tail import AlertTail
+
+
+def _writer(path: Path, **options) -> JournalWriter:
+    options = {"flush_records": 1000, "flush_ms": 60_000, "max_age": 86_400, **options}
+    return JournalWriter(path, **options)
+
+
+def _ids(lines: list[str]) -> list[int]:
+    return [json.loads(line)["id"] for line in lines]
+
+
+def test_partial_lines_wait_for_their_newline(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.jsonl"
+    path.write_bytes(b'{"id": 1}\n{"id": ')
+    tail = AlertTail(path)
+    assert _ids(tail.read_lines()) == [1]
+    with path.open("ab") as handle:
+        handle.write(b'2}\n')
+    assert _ids(tail.read_lines()) == [2]
+    assert tail.read_lines() == []
+    tail.close()
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_follows_rotation_while_reading(tmp_path: Path, compression: str) -> None:
+    path = tmp_path / "alerts.jsonl"
+    tail = AlertTail(path)
+    seen: list[int] = []
+
+    async def run() -> None:
+        writer = _writer(path, max_bytes=120, compression=compression)
+        for alert_id in range(1, 101):
+            writer.append({"id": alert_id})
+            if alert_id % 7 == 0:
+                await writer.flush()
+                seen.extend(_ids(tail.read_lines()))
+        await writer.close()
+
+    asyncio.run(run())
+    seen.extend(_ids(tail.read_lines()))
+    tail.close()
+    assert seen == list(range(1, 101))
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_restart_from_saved_position_catches_up_on_sealed_segments(
+    tmp_path: Path, compression: str
+) -> None:
+    path = tmp_path / "alerts.jsonl"
+
+    async def write(writer: JournalWriter, ids: range) -> None:
+        for alert_id in ids:
+            writer.append({"id": alert_id})
+            await writer.flush()
+
+    async def run() -> list[int]:
+        writer = _writer(path, max_bytes=60, compression=compression)
+        await write(writer, range(1, 11))
+        tail = AlertTail(path)
+        seen = _ids(tail.read_lines())
+        saved = (tail.inode, tail.offset, tail.fingerprint)
+        tail.close()
+        # Several segments are sealed (and compressed, freeing inodes) while the reader is down.
+        await write(writer, range(11, 61))
+        tail = AlertTail(path, *saved)
+        seen += _ids(tail.read_lines())
+        await write(writer, range(61, 66))
+        seen += _ids(tail.read_lines())
+        tail.close()
+        await writer.close()
+        return seen
+
+    assert asyncio.run(run()) == list(range(1, 66))
+
+
+def test_restart_without_a_position_starts_at_the_oldest_segment(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.jsonl"
+
+    async def run() -> None:
+        writer = _writer(path, max_bytes=40)
+        for alert_id in range(1, 21):
+            writer.append({"id": alert_id})
+            await writer.flush()
+        await writer.close()
+
+    asyncio.run(run())
+    tail = AlertTail(path)
+    assert _ids(tail.read_lines()) == list(range(1, 21))
+    tail.close()
+
+
+def test_truncation_restarts_from_the_top(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.jsonl"
+    path.write_text("".join(json.dumps({"id": alert_id}) + "\n" for alert_id in range(1, 6)))
+    tail = AlertTail(path)
+    assert _ids(tail.read_lines()) == [1, 2, 3, 4, 5]
+    with path.open("w") as handle:
+        handle.write(json.dumps({"id": 6}) + "\n")
+    assert _ids(tail.read_lines()) == [6]
+    tail.close()
+
+
+def test_rename_without_journal_drains_the_old_file_first(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.jsonl"
+    path.write_text(json.dumps({"id": 1}) + "\n")
+    tail = AlertTail(path)
+    assert _ids(tail.read_lines()) == [1]
+    with path.open("a") as handle:
+        handle.write(json.dumps({"id": 2}) + "\n")
+    path.rename(tmp_path / "alerts.jsonl.1")
+    path.write_text(json.dumps({"id": 3}) + "\n")
+    assert _ids(tail.read_lines()) == [2, 3]
+    tail.close()
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_randomized_writes_rotations_and_restarts(tmp_path: Path, seed: int) -> None:
+    rng = random.Random(seed)
+    path = tmp_path / "alerts.jsonl"
+    compression = rng.choice(["none", "gzip"])
+    total = 300
+
+    async def run() -> list[int]:
+        writer = _writer(path, max_bytes=rng.randint(50, 400), compression=compression)
+        tail = AlertTail(path)
+        seen: list[int] = []
+        alert_id = 0
+        while alert_id < total:
+            for _ in range(rng.randint(1, 15)):
+                alert_id += 1
+                writer.append({"id": alert_id})
+                if alert_id == total:
+                    break
+            await writer.flush()
+            roll = rng.random()
+            if roll < 0.5:
+                seen += _ids(tail.read_lines())
+            elif roll < 0.7:
+                # Restart from the checkpoint a responder would have saved.
+                saved = (tail.inode, tail.offset, tail.fingerprint)
+                tail.close()
+                tail = AlertTail(path, *saved)
+        await writer.close()
+        seen += _ids(tail.read_lines())
+        tail.close()
+        return seen
+
+    assert asyncio.run(run()) == list(range(1, total + 1)), f"compression={compression}"
@@ -0,0 +1,124 @@
+"""Compare the streaming Nmap parser with the legacy xmltodict parser.
+
+Run from the ``scanner`` directory (the legacy path needs ``pip install xmltodict``)::
+
+    python -m benchmarks.parse_benchmark --hosts 10000
+
+Each parser runs in a fresh interpreter so peak RSS is measured in isolation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# src.runner imports the shared backend client from the repository root's ``common`` package.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+PORTS = [(22, "ssh"), (80, "http"), (443, "https"), (3389, "ms-wbt-server"), (8080, "http-proxy")]
+
+
+def write_synthetic_xml(path: Path, hosts: int) -> None:
+    with path.open("w", encoding="utf-8") as xml_file:
+        xml_file.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap">\n')
+        for index in range(hosts):
+            ip = f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+            xml_file.write(
+                f'<host><status state="up"/><address addr="{ip}" addrtype="ipv4"/>'
+                f'<hostnames><hostname name="host-{index}.lab" type="PTR"/></hostnames><ports>'
+            )
+            for port, service in PORTS:
+                xml_file.write(
+                    f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+                    f'<service name="{service}" product="demo" version="1.{index % 10}" method="probed">'
+                    f"<cpe>cpe:/a:demo:{service}</cpe></service></port>"
+                )
+            xml_file.write(
+                '</ports><os><osmatch name="Linux 5.X" accuracy="96"/>'
+                '<osmatch name="Linux 4.X" accuracy="90"/></os></host>\n'
+            )
+        xml_file.write("</nmaprun>\n")
+
+
+def legacy_parse(xml_path: Path) -> dict[str, Any]:
+    import xmltodict
+
+    parsed = xmltodict.parse(xml_path.read_text())
+    hosts = parsed.get("nmaprun", {}).get("host", [])
+    if isinstance(hosts, dict):
+        hosts = [hosts]
+    results: list[dict[str, Any]] = []
+    for host in hosts:
+        address = host.get("address", {})
+        if isinstance(address, list):
+            address = address[0]
+        ports_info = host.get("ports", {}).get("port", [])
+        if isinstance(ports_info, dict):
+            ports_info = [ports_info]
+        ports = [
+            {
+                "port": int(port.get("@portid", 0)),
+                "protocol": port.get("@protocol", "tcp"),
+                "state": port.get("state", {}).get("@state", "unknown"),
+                "service": port.get("service", {}).get("@name", "unknown"),
+            }
+            for port in ports_info
+        ]
+        results.append({"ip": address.get("@addr", "unknown"), "ports": ports})
+    return {"hosts": results}
+
+
+def run_parser(mode: str, xml_path: Path) -> None:
+    started = time.perf_counter()
+    if mode == "legacy":
+        count = len(legacy_parse(xml_path)["hosts"])
+    else:
+        from src.runner import iter_scan_hosts
+
+        count = sum(1 for _ in iter_scan_hosts(xml_path))
+    elapsed = time.perf_counter() - started
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"mode": mode, "hosts": count, "seconds": elapsed, "peak_rss_mib": peak_kib / 1024}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=10_000)
+    parser.add_argument("--mode", choices=("legacy", "streaming"))
+    parser.add_argument("--xml", type=Path)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_parser(args.mode, args.xml)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = Path(tmp_dir) / "synthetic.xml"
+        write_synthetic_xml(xml_path, args.hosts)
+        size_mib = xml_path.stat().st_size / (1024 * 1024)
+        print(f"synthetic sweep: {args.hosts} hosts, {size_mib:.1f} MiB")
+        for mode in ("legacy", "streaming"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.parse_benchmark", "--mode", mode, "--xml", str(xml_path)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            print(
+                f"{mode:>9}: {result['hosts']} hosts in {result['seconds']:.2f}s, "
+                f"peak RSS {result['peak_rss_mib']:.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
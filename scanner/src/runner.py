@@ -1,41 +1,94 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import ipaddress
 import json
 import os
-import subprocess
+import time
+from collections.abc import Iterator
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from typing import Any
+from xml.etree import ElementTree
 
 import httpx
-import xmltodict
 from loguru import logger
 
+from common.client import create_backend_client
+
+from .scheduler import HostScheduler
+from .spool import ScanSpool, SpoolEntry
+
 DATA_DIR = Path(os.getenv("SCAN_DATA_DIR", "/data/scans"))
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://backend:8000")
 SCAN_TARGETS = os.getenv("SCAN_TARGETS", "192.168.1.0/24")
 SCAN_INTERVAL = int(os.getenv("SCAN_INTERVAL", "900"))
 NMAP_BINARY = os.getenv("NMAP_BINARY", "nmap")
+SCAN_BATCH_SIZE = int(os.getenv("SCAN_BATCH_SIZE", "500"))
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", str(os.cpu_count() or 4)))
+SCAN_SHARD_PREFIX = int(os.getenv("SCAN_SHARD_PREFIX", "26"))
+SCAN_HOST_TIMEOUT = os.getenv("SCAN_HOST_TIMEOUT", "")
+SCAN_DELTA_MODE = os.getenv("SCAN_DELTA_MODE", "0").lower() in ("1", "true", "yes")
+SCAN_FINGERPRINT_TTL = int(os.getenv("SCAN_FINGERPRINT_TTL", "86400"))
+SCAN_STATE_PATH = Path(os.getenv("SCAN_STATE_PATH", str(DATA_DIR / ".fingerprints.json")))
+SCAN_SPOOL_PATH = Path(os.getenv("SCAN_SPOOL_PATH", str(DATA_DIR / ".spool.sqlite3")))
+SCAN_SPOOL_MAX_BATCHES = int(os.getenv("SCAN_SPOOL_MAX_BATCHES", "10000"))
+SCAN_SPOOL_RETRY_MAX = float(os.getenv("SCAN_SPOOL_RETRY_MAX", "300"))
+SCAN_ADAPTIVE = os.getenv("SCAN_ADAPTIVE", "0").lower() in ("1", "true", "yes")
+SCAN_MIN_INTERVAL = int(os.getenv("SCAN_MIN_INTERVAL", "300"))
+SCAN_MAX_INTERVAL = int(os.getenv("SCAN_MAX_INTERVAL", "86400"))
+SCAN_BUDGET_PER_MINUTE = int(os.getenv("SCAN_BUDGET_PER_MINUTE", "60"))
+SCAN_ADAPTIVE_BATCH = int(os.getenv("SCAN_ADAPTIVE_BATCH", "16"))
+SCAN_SCHEDULE_PATH = Path(os.getenv("SCAN_SCHEDULE_PATH", str(DATA_DIR / ".schedule.json")))
+HOST_DISCOVERY_ARGS = os.getenv("SCAN_HOST_DISCOVERY_ARGS", "-sn").split()
+# Longest rescan interval per latest alert severity; hosts without alerts back off to the max.
+SEVERITY_INTERVAL_CAPS = {
+    "critical": SCAN_MIN_INTERVAL,
+    "high": SCAN_MIN_INTERVAL,
+    "medium": SCAN_INTERVAL,
+}
+DETAIL_SCAN_ARGS = ["-sV", "-O", "-Pn"]
+DISCOVERY_SCAN_ARGS = os.getenv("SCAN_DISCOVERY_ARGS", "-T4 -Pn").split()
+
+SERVICE_DETAIL_KEYS = ("product", "version", "extrainfo", "ostype", "tunnel")
 
 
 def ensure_data_dir() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def run_nmap_scan(output_file: Path) -> None:
-    command = [
-        NMAP_BINARY,
-        "-sV",
-        "-O",
-        "-Pn",
-        SCAN_TARGETS,
-        "-oX",
-        str(output_file),
-    ]
+def split_targets(targets: str, shard_prefix: int) -> list[str]:
+    shards: list[str] = []
+    for target in targets.replace(",", " ").split():
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            # Hostnames and nmap-style ranges (10.0.0-5.1) are scanned as a single shard.
+            shards.append(target)
+            continue
+        if network.version == 4 and network.prefixlen < shard_prefix:
+            shards.extend(str(subnet) for subnet in network.subnets(new_prefix=shard_prefix))
+        else:
+            shards.append(str(network))
+    return shards
+
+
+async def run_nmap_scan(
+    targets: list[str], output_file: Path, scan_args: list[str] = DETAIL_SCAN_ARGS
+) -> None:
+    command = [NMAP_BINARY, *scan_args]
+    if SCAN_HOST_TIMEOUT:
+        command += ["--host-timeout", SCAN_HOST_TIMEOUT]
+    command += [*targets, "-oX", str(output_file)]
     logger.info("Running Nmap command: {}", " ".join(command))
     try:
-        subprocess.run(command, check=True, capture_output=True, text=True)
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
     except FileNotFoundError:
         logger.warning("Nmap binary not found. Generating demo scan output instead.")
         output_file.write_text(
@@ -57,89 +110,374 @@ def run_nmap_scan(output_file: Path) -> None:
 </nmaprun>
 """
         )
-    except subprocess.CalledProcessError as exc:
-        logger.error("Nmap failed: {}", exc)
+        return
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        logger.error(
+            "Nmap failed for {} (exit {}): {}",
+            " ".join(targets),
+            process.returncode,
+            stderr.decode().strip(),
+        )
         if not output_file.exists():
             output_file.write_text("""<nmaprun></nmaprun>""")
 
 
-def parse_scan_xml(xml_path: Path) -> dict[str, Any]:
+def normalize_host(host: ElementTree.Element) -> dict[str, Any]:
+    addresses = host.findall("address")
+    address = next(
+        (addr for addr in addresses if addr.get("addrtype") in ("ipv4", "ipv6")),
+        addresses[0] if addresses else None,
+    )
+    ip = address.get("addr", "unknown") if address is not None else "unknown"
+
+    ports: list[dict[str, Any]] = []
+    for port in host.iterfind("ports/port"):
+        state = port.find("state")
+        service = port.find("service")
+        entry: dict[str, Any] = {
+            "port": int(port.get("portid", 0)),
+            "protocol": port.get("protocol", "tcp"),
+            "state": state.get("state", "unknown") if state is not None else "unknown",
+            "service": service.get("name", "unknown") if service is not None else "unknown",
+        }
+        if service is not None:
+            entry.update({key: service.get(key) for key in SERVICE_DETAIL_KEYS if service.get(key)})
+            cpes = [cpe.text for cpe in service.iterfind("cpe") if cpe.text]
+            if cpes:
+                entry["cpe"] = cpes
+        ports.append(entry)
+
+    result: dict[str, Any] = {"ip": ip, "ports": ports}
+    status = host.find("status")
+    if status is not None:
+        result["status"] = status.get("state", "unknown")
+    hostnames = [name.get("name") for name in host.iterfind("hostnames/hostname") if name.get("name")]
+    if hostnames:
+        result["hostname"] = hostnames[0]
+        result["hostnames"] = hostnames
+    os_matches = host.findall("os/osmatch")
+    if os_matches:
+        best = max(os_matches, key=lambda match: int(match.get("accuracy", 0)))
+        result["os"] = best.get("name", "unknown")
+        result["os_accuracy"] = int(best.get("accuracy", 0))
+    return result
+
+
+def iter_scan_hosts(xml_path: Path) -> Iterator[dict[str, Any]]:
     if not xml_path.exists():
+        return
+    try:
+        context = ElementTree.iterparse(xml_path, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event == "end" and elem.tag == "host":
+                yield normalize_host(elem)
+                # Drop the finished host (and anything the root still references) so memory
+                # stays flat no matter how many hosts the sweep produced.
+                elem.clear()
+                root.clear()
+    except ElementTree.ParseError as exc:
+        logger.error("Failed to parse Nmap XML {}: {}", xml_path, exc)
+
+
+def batched_hosts(hosts: Iterator[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    while batch := list(islice(hosts, size)):
+        yield batch
+
+
+def host_fingerprint(host: dict[str, Any]) -> str:
+    open_ports = sorted(
+        f"{port.get('port')}/{port.get('protocol')}/{port.get('service')}"
+        for port in host.get("ports", [])
+        if port.get("state") == "open"
+    )
+    return hashlib.sha1("|".join(open_ports).encode()).hexdigest()
+
+
+def load_fingerprints() -> dict[str, dict[str, Any]]:
+    if not SCAN_STATE_PATH.exists():
         return {}
     try:
-        xml_content = xml_path.read_text()
-        parsed = xmltodict.parse(xml_content)
-    except Exception as exc:  # noqa: BLE001
-        logger.exception("Failed to parse Nmap XML: {}", exc)
+        return json.loads(SCAN_STATE_PATH.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
         return {}
 
-    hosts = parsed.get("nmaprun", {}).get("host", [])
-    if isinstance(hosts, dict):
-        hosts = [hosts]
-
-    results: list[dict[str, Any]] = []
-    for host in hosts:
-        address = host.get("address", {})
-        if isinstance(address, list):
-            address = address[0]
-        ip = address.get("@addr", "unknown")
-        ports_info = host.get("ports", {}).get("port", [])
-        if isinstance(ports_info, dict):
-            ports_info = [ports_info]
-        ports: list[dict[str, Any]] = []
-        for port in ports_info:
-            ports.append(
-                {
-                    "port": int(port.get("@portid", 0)),
-                    "protocol": port.get("@protocol", "tcp"),
-                    "state": port.get("state", {}).get("@state", "unknown"),
-                    "service": port.get("service", {}).get("@name", "unknown"),
-                }
-            )
-        results.append({"ip": ip, "ports": ports})
-    return {"generated_at": datetime.utcnow().isoformat(), "hosts": results}
-
-
-async def post_scan_to_backend(payload: dict[str, Any]) -> None:
-    async with httpx.AsyncClient(base_url=BACKEND_BASE_URL, timeout=30) as client:
-        for host in payload.get("hosts", []):
-            hostname = host.get("hostname", "auto-discovered")
-            ip_address = host.get("ip", "0.0.0.0")
-            asset_response = await client.post(
-                "/api/v1/assets",
-                json={"hostname": hostname, "ip_address": ip_address, "os": "unknown"},
-            )
+
+def save_fingerprints(fingerprints: dict[str, dict[str, Any]]) -> None:
+    tmp_path = SCAN_STATE_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(fingerprints), encoding="utf-8")
+    tmp_path.replace(SCAN_STATE_PATH)
+
+
+async def post_scan_to_backend(client: httpx.AsyncClient, entry: SpoolEntry) -> int:
+    response = await client.post(
+        "/api/v1/scans:bulk",
+        json={
+            "command": f"nmap {entry.targets}",
+            "raw_output_path": entry.raw_output_path,
+            "started_at": datetime.utcfromtimestamp(entry.started_at).isoformat(),
+            "ended_at": (
+                datetime.utcfromtimestamp(entry.ended_at).isoformat() if entry.ended_at else None
+            ),
+            "hosts": entry.hosts,
+            "idempotency_key": entry.idempotency_key,
+        },
+    )
+    response.raise_for_status()
+    return len(response.json().get("items", []))
+
+
+async def drain_spool(client: httpx.AsyncClient, spool: ScanSpool) -> None:
+    """Deliver spooled batches in order; a batch leaves the spool only once it is accepted."""
+    while True:
+        await spool.wait()
+        for entry in await spool.head(16):
             try:
-                asset_response.raise_for_status()
-                asset_id = asset_response.json().get("id")
-            except (httpx.HTTPStatusError, ValueError):
-                logger.error("Failed to create asset for %s", ip_address)
+                reported = await post_scan_to_backend(client, entry)
+            except httpx.HTTPStatusError as exc:
+                status = exc.response.status_code
+                if 400 <= status < 500 and status != 429:
+                    logger.error("Backend rejected spooled batch {} ({}), parking it", entry.id, status)
+                    await spool.bury(entry)
+                    continue
+                failure: Exception = exc
+            except (httpx.HTTPError, ValueError) as exc:
+                failure = exc
+            else:
+                await spool.ack(entry)
+                logger.info(
+                    "Reported {} scans in one batch ({} batches spooled)", reported, spool.pending
+                )
                 continue
-            scan_response = await client.post(
-                "/api/v1/scans",
-                json={
-                    "asset_id": asset_id,
-                    "command": f"nmap {SCAN_TARGETS}",
-                    "parsed_result": host,
-                },
-            )
-            logger.info(
-                "Reported scan for %s -> status=%s", ip_address, scan_response.status_code
+            # The client already retried; back off the whole queue so batches stay in order.
+            await spool.record_failure(entry)
+            delay = min(SCAN_SPOOL_RETRY_MAX, 2 ** min(entry.attempts, 16))
+            logger.warning(
+                "Could not report {} hosts ({}), {} batches spooled, retrying in {:.0f}s",
+                len(entry.hosts),
+                failure,
+                spool.pending,
+                delay,
             )
+            await asyncio.sleep(delay)
+            break
 
 
-async def scan_loop() -> None:
-    ensure_data_dir()
+async def timed_nmap_scan(targets: list[str], output_file: Path) -> tuple[float, float]:
+    """Run a detail scan and return when it started and finished (epoch seconds)."""
+    started_at = time.time()
+    await run_nmap_scan(targets, output_file)
+    return started_at, time.time()
+
+
+async def report_hosts(
+    spool: ScanSpool, output_file: Path, targets: str, scanned: tuple[float, float]
+) -> dict[str, str]:
+    """Spool every host in the Nmap output; returns the open-port fingerprint per IP.
+
+    ``scanned`` is the (start, end) time of the Nmap run, reported as the scans' times.
+    """
+    fingerprints: dict[str, str] = {}
+    with output_file.with_suffix(".jsonl").open("w", encoding="utf-8") as parsed_file:
+        for hosts in batched_hosts(iter_scan_hosts(output_file), SCAN_BATCH_SIZE):
+            parsed_file.writelines(json.dumps(host) + "\n" for host in hosts)
+            await spool.enqueue(hosts, output_file, targets, *scanned)
+            fingerprints.update((host["ip"], host_fingerprint(host)) for host in hosts)
+    return fingerprints
+
+
+async def scan_shard(
+    spool: ScanSpool, semaphore: asyncio.Semaphore, target: str, output_file: Path
+) -> None:
+    async with semaphore:
+        scanned = await timed_nmap_scan([target], output_file)
+    await report_hosts(spool, output_file, target, scanned)
+
+
+async def scan_shard_delta(
+    spool: ScanSpool,
+    semaphore: asyncio.Semaphore,
+    target: str,
+    output_file: Path,
+    fingerprints: dict[str, dict[str, Any]],
+) -> None:
+    discovery_file = output_file.with_name(f"{output_file.stem}_discovery.xml")
+    async with semaphore:
+        await run_nmap_scan([target], discovery_file, DISCOVERY_SCAN_ARGS)
+
+    now = time.time()
+    changed: dict[str, str] = {}
+    for host in iter_scan_hosts(discovery_file):
+        fingerprint = host_fingerprint(host)
+        known = fingerprints.get(host["ip"])
+        if (
+            known is None
+            or known["fingerprint"] != fingerprint
+            or now - known["checked_at"] > SCAN_FINGERPRINT_TTL
+        ):
+            changed[host["ip"]] = fingerprint
+    discovery_file.unlink(missing_ok=True)
+    if not changed:
+        logger.debug("No changed hosts in shard {}", target)
+        return
+
+    logger.info("Shard {}: {} hosts changed or expired, running detail scan", target, len(changed))
+    async with semaphore:
+        scanned = await timed_nmap_scan(list(changed), output_file)
+    # A spooled host is guaranteed to reach the backend, so it counts as reported. Hosts missing
+    # from the detail output (e.g. Nmap failed) keep their old fingerprint and are retried.
+    spooled = await report_hosts(spool, output_file, target, scanned)
+    for ip, fingerprint in changed.items():
+        if ip in spooled:
+            fingerprints[ip] = {"fingerprint": fingerprint, "checked_at": now}
+
+
+async def run_sweep(
+    spool: ScanSpool,
+    shards: list[str],
+    semaphore: asyncio.Semaphore,
+    fingerprints: dict[str, dict[str, Any]],
+) -> None:
+    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    started = time.monotonic()
+    tasks = []
+    for index, shard in enumerate(shards):
+        output_file = DATA_DIR / f"scan_{timestamp}_{index:04d}.xml"
+        if SCAN_DELTA_MODE:
+            tasks.append(scan_shard_delta(spool, semaphore, shard, output_file, fingerprints))
+        else:
+            tasks.append(scan_shard(spool, semaphore, shard, output_file))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for shard, result in zip(shards, results):
+        if isinstance(result, Exception):
+            logger.error("Shard {} failed: {}", shard, result)
+    if SCAN_DELTA_MODE:
+        save_fingerprints(fingerprints)
+    logger.info(
+        "Sweep finished in {:.1f}s, {} batches waiting for the backend",
+        time.monotonic() - started,
+        spool.pending,
+    )
+
+
+async def scan_scheduled_hosts(
+    spool: ScanSpool, semaphore: asyncio.Semaphore, scheduler: HostScheduler, ips: list[str]
+) -> None:
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+    output_file = DATA_DIR / f"scan_{stamp}_hosts.xml"
+    fingerprints: dict[str, str] = {}
+    try:
+        async with semaphore:
+            scanned = await timed_nmap_scan(ips, output_file)
+        fingerprints = await report_hosts(spool, output_file, " ".join(ips), scanned)
+    finally:
+        # Hosts missing from the output did not answer; they back off like unchanged ones.
+        for ip in ips:
+            scheduler.complete(ip, fingerprints.get(ip))
+        scheduler.save(SCAN_SCHEDULE_PATH)
+
+
+async def fetch_asset_risk(client: httpx.AsyncClient) -> dict[str, str | None]:
+    severities: dict[str, str | None] = {}
+    after_id = 0
+    while True:
+        response = await client.get("/api/v1/assets/risk", params={"after_id": after_id})
+        response.raise_for_status()
+        rows = response.json()
+        if not rows:
+            return severities
+        severities.update((row["ip_address"], row["severity"]) for row in rows)
+        after_id = rows[-1]["asset_id"]
+
+
+async def refresh_schedule(
+    client: httpx.AsyncClient,
+    shards: list[str],
+    semaphore: asyncio.Semaphore,
+    scheduler: HostScheduler,
+    changed: asyncio.Event,
+) -> None:
+    """Every SCAN_INTERVAL, find live hosts with a cheap discovery pass and pull alert severities."""
     while True:
         timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-        output_file = DATA_DIR / f"scan_{timestamp}.xml"
-        run_nmap_scan(output_file)
-        parsed = parse_scan_xml(output_file)
-        (DATA_DIR / f"scan_{timestamp}.json").write_text(json.dumps(parsed, indent=2))
-        await post_scan_to_backend(parsed)
+        for index, shard in enumerate(shards):
+            discovery_file = DATA_DIR / f"scan_{timestamp}_{index:04d}_hosts.xml"
+            async with semaphore:
+                await run_nmap_scan([shard], discovery_file, HOST_DISCOVERY_ARGS)
+            for host in iter_scan_hosts(discovery_file):
+                if host.get("status", "up") == "up" and host["ip"] != "unknown":
+                    scheduler.add(host["ip"])
+            discovery_file.unlink(missing_ok=True)
+        try:
+            for ip, severity in (await fetch_asset_risk(client)).items():
+                scheduler.set_severity(ip, severity)
+        except (httpx.HTTPError, ValueError) as exc:
+            logger.warning("Could not fetch asset risk, keeping previous priorities: {}", exc)
+        logger.info("Tracking {} hosts for adaptive scanning", len(scheduler.hosts))
+        changed.set()
         await asyncio.sleep(SCAN_INTERVAL)
 
 
+async def adaptive_loop(
+    client: httpx.AsyncClient, spool: ScanSpool, shards: list[str], semaphore: asyncio.Semaphore
+) -> None:
+    scheduler = HostScheduler(
+        SCAN_MIN_INTERVAL, SCAN_MAX_INTERVAL, SCAN_BUDGET_PER_MINUTE, SEVERITY_INTERVAL_CAPS
+    )
+    scheduler.load(SCAN_SCHEDULE_PATH)
+    changed = asyncio.Event()
+    refresher = asyncio.create_task(refresh_schedule(client, shards, semaphore, scheduler, changed))
+    scans: set[asyncio.Task[None]] = set()
+    try:
+        while True:
+            if ips := scheduler.take_due(SCAN_ADAPTIVE_BATCH):
+                task = asyncio.create_task(scan_scheduled_hosts(spool, semaphore, scheduler, ips))
+                scans.add(task)
+                task.add_done_callback(scans.discard)
+                continue
+            changed.clear()
+            try:
+                await asyncio.wait_for(changed.wait(), max(scheduler.seconds_until_due(), 0.1))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        refresher.cancel()
+        for task in scans:
+            task.cancel()
+        await asyncio.gather(refresher, *scans, return_exceptions=True)
+
+
+async def scan_loop() -> None:
+    ensure_data_dir()
+    shards = split_targets(SCAN_TARGETS, SCAN_SHARD_PREFIX)
+    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+    fingerprints = load_fingerprints() if SCAN_DELTA_MODE else {}
+    logger.info(
+        "Scanning {} shards with concurrency {} (delta mode {}, adaptive {})",
+        len(shards),
+        SCAN_CONCURRENCY,
+        "on" if SCAN_DELTA_MODE else "off",
+        "on" if SCAN_ADAPTIVE else "off",
+    )
+    spool = ScanSpool(SCAN_SPOOL_PATH, SCAN_SPOOL_MAX_BATCHES)
+    if spool.pending:
+        logger.info("Resuming delivery of {} spooled batches", spool.pending)
+    async with create_backend_client(BACKEND_BASE_URL) as client:
+        drainer = asyncio.create_task(drain_spool(client, spool))
+        try:
+            if SCAN_ADAPTIVE:
+                await adaptive_loop(client, spool, shards, semaphore)
+            else:
+                while True:
+                    await run_sweep(spool, shards, semaphore, fingerprints)
+                    await asyncio.sleep(SCAN_INTERVAL)
+        finally:
+            drainer.cancel()
+            await asyncio.gather(drainer, return_exceptions=True)
+            spool.close()
+
+
 def main() -> None:
     try:
         asyncio.run(scan_loop())
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import heapq
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class HostSchedule:
+    ip: str
+    interval: float
+    due: float
+    fingerprint: str | None = None
+    severity: str | None = None
+    scanned_at: float | None = None
+
+
+class HostScheduler:
+    """Per-host rescan times in a heap, drawn down under a hosts-per-minute budget.
+
+    A host whose open ports changed is rescanned after ``min_interval``; every unchanged scan
+    doubles its interval up to ``max_interval``. ``severity_caps`` bound the interval by the
+    host's latest alert severity, so risky hosts never back off far. Due times are wall-clock
+    so the schedule can be saved and resumed.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        budget_per_minute: int,
+        severity_caps: dict[str, float],
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget_per_minute = budget_per_minute
+        self.severity_caps = severity_caps
+        self.hosts: dict[str, HostSchedule] = {}
+        # Entries go stale when a host is rescheduled; they are skipped when popped.
+        self._heap: list[tuple[float, str]] = []
+        self._tokens = float(budget_per_minute)
+        self._refilled_at = time.monotonic()
+
+    def _cap(self, severity: str | None) -> float:
+        return min(self.max_interval, self.severity_caps.get(severity or "", self.max_interval))
+
+    def _push(self, host: HostSchedule) -> None:
+        heapq.heappush(self._heap, (host.due, host.ip))
+
+    def add(self, ip: str) -> None:
+        if ip not in self.hosts:
+            host = HostSchedule(ip, self.min_interval, time.time())
+            self.hosts[ip] = host
+            self._push(host)
+
+    def set_severity(self, ip: str, severity: str | None) -> None:
+        host = self.hosts.get(ip)
+        if host is None or host.severity == severity:
+            return
+        host.severity = severity
+        host.interval = min(host.interval, self._cap(severity))
+        # A new or raised alert pulls the next scan forward instead of waiting out the old interval.
+        due = max(time.time(), (host.scanned_at or 0) + host.interval)
+        if due < host.due:
+            host.due = due
+            self._push(host)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.budget_per_minute / 60
+        self._tokens = min(float(self.budget_per_minute), self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    def take_due(self, limit: int) -> list[str]:
+        """Pop up to ``limit`` due hosts, most overdue first, as far as the budget allows."""
+        self._refill()
+        now = time.time()
+        taken: list[str] = []
+        while self._heap and len(taken) < min(limit, int(self._tokens)):
+            due, ip = self._heap[0]
+            host = self.hosts.get(ip)
+            if host is None or host.due != due:
+                heapq.heappop(self._heap)
+                continue
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            taken.append(ip)
+        self._tokens -= len(taken)
+        return taken
+
+    def seconds_until_due(self) -> float:
+        """How long until ``take_due`` can return something (budget permitting)."""
+        while self._heap:
+            due, ip = self._heap[0]
+            host = self.hosts.get(ip)
+            if host is not None and host.due == due:
+                break
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return self.max_interval
+        wait = max(0.0, self._heap[0][0] - time.time())
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) * 60 / self.budget_per_minute)
+        return wait
+
+    def complete(self, ip: str, fingerprint: str | None) -> None:
+        """Reschedule a host after its scan; ``fingerprint`` is None if it did not answer."""
+        host = self.hosts.get(ip)
+        if host is None:
+            return
+        if fingerprint is not None and host.fingerprint is not None and fingerprint != host.fingerprint:
+            host.interval = self.min_interval
+        else:
+            host.interval = min(self.max_interval, host.interval * 2)
+        if fingerprint is not None:
+            host.fingerprint = fingerprint
+        host.interval = min(host.interval, self._cap(host.severity))
+        host.scanned_at = time.time()
+        host.due = host.scanned_at + host.interval
+        self._push(host)
+
+    def save(self, path: Path) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps([asdict(host) for host in self.hosts.values()]), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def load(self, path: Path) -> None:
+        try:
+            entries: list[dict[str, Any]] = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for entry in entries:
+            host = HostSchedule(**entry)
+            self.hosts[host.ip] = host
+            self._push(host)
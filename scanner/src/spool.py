@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class SpoolEntry:
+    id: int
+    targets: str
+    raw_output_path: str | None
+    hosts: list[dict[str, Any]]
+    attempts: int
+    # When Nmap ran, as epoch seconds; batches spooled before this was recorded use enqueued_at.
+    started_at: float
+    ended_at: float | None
+    # Unique across spool files, so the backend can tell a redelivery from a new batch.
+    idempotency_key: str
+
+
+class ScanSpool:
+    """Durable FIFO of host batches waiting to be reported, kept in SQLite (WAL mode).
+
+    A batch stays in the spool until it is acknowledged after the backend accepted it, so
+    nothing is lost when the backend is down or the scanner restarts. ``enqueue`` waits while
+    ``max_batches`` are pending, which is the only point where scanning slows to the
+    backend's pace.
+    """
+
+    def __init__(self, path: Path, max_batches: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_batches = max_batches
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Every enqueue/ack is on disk before it returns, not just safe against process crashes.
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " targets TEXT NOT NULL,"
+            " raw_output_path TEXT,"
+            " hosts TEXT NOT NULL,"
+            " enqueued_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " dead INTEGER NOT NULL DEFAULT 0,"
+            " started_at REAL,"
+            " ended_at REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}
+        for column in ("started_at", "ended_at"):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE outbox ADD COLUMN {column} REAL")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_outbox_live ON outbox (dead, id)")
+        # Outbox ids restart when the spool file is recreated; the spool id keeps keys unique.
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('spool_id', ?)", (uuid.uuid4().hex,)
+        )
+        self.spool_id = self._db.execute("SELECT value FROM meta WHERE key = 'spool_id'").fetchone()[0]
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Condition()
+        self._pending = self._db.execute("SELECT count(*) FROM outbox WHERE dead = 0").fetchone()[0]
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, sql: str, params: tuple[Any, ...] = ()) -> list[tuple[Any, ...]]:
+        async with self._lock:
+            return await asyncio.to_thread(lambda: self._db.execute(sql, params).fetchall())
+
+    async def enqueue(
+        self,
+        hosts: list[dict[str, Any]],
+        raw_output_path: Path | None,
+        targets: str,
+        started_at: float,
+        ended_at: float | None,
+    ) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._pending < self.max_batches)
+            await self._run(
+                "INSERT INTO outbox"
+                " (targets, raw_output_path, hosts, enqueued_at, started_at, ended_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    targets,
+                    str(raw_output_path) if raw_output_path else None,
+                    json.dumps(hosts),
+                    time.time(),
+                    started_at,
+                    ended_at,
+                ),
+            )
+            self._pending += 1
+            self._changed.notify_all()
+
+    async def wait(self) -> None:
+        """Block until something is pending."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._pending > 0)
+
+    async def head(self, limit: int) -> list[SpoolEntry]:
+        rows = await self._run(
+            "SELECT id, targets, raw_output_path, hosts, attempts, coalesce(started_at, enqueued_at), "
+            "ended_at FROM outbox WHERE dead = 0 ORDER BY id LIMIT ?",
+            (limit,),
+        )
+        return [
+            SpoolEntry(
+                id=row[0],
+                targets=row[1],
+                raw_output_path=row[2],
+                hosts=json.loads(row[3]),
+                attempts=row[4],
+                started_at=row[5],
+                ended_at=row[6],
+                idempotency_key=f"{self.spool_id}-{row[0]}",
+            )
+            for row in rows
+        ]
+
+    async def ack(self, entry: SpoolEntry) -> None:
+        await self._settle("DELETE FROM outbox WHERE id = ?", entry)
+
+    async def bury(self, entry: SpoolEntry) -> None:
+        """Keep a batch the backend will never accept for inspection, out of the queue."""
+        await self._settle("UPDATE outbox SET dead = 1 WHERE id = ?", entry)
+
+    async def record_failure(self, entry: SpoolEntry) -> None:
+        entry.attempts += 1
+        await self._run("UPDATE outbox SET attempts = ? WHERE id = ?", (entry.attempts, entry.id))
+
+    async def _settle(self, sql: str, entry: SpoolEntry) -> None:
+        async with self._changed:
+            await self._run(sql, (entry.id,))
+            self._pending -= 1
+            self._changed.notify_all()
+
+    def close(self) -> None:
+        self._db.close()